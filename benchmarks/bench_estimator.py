@@ -0,0 +1,268 @@
+"""
+推測エンジンの速度・メモリ・精度のベンチマーク。
+
+    python -m benchmarks.bench_estimator                      # 計測して結果をbenchmarks/results/に保存
+    python -m benchmarks.bench_estimator --compare <結果.json> # 以前の結果より遅くなっていないか確認
+    python -m benchmarks.bench_estimator --check-accuracy      # 精度が基準値から変わっていないか確認
+    python -m benchmarks.bench_estimator --update-accuracy     # 精度の基準値を更新（スペック表の変更時）
+
+精度は固定シードの模擬データ（GAME_DATAから生成）で測る。同じNumPyのバージョンなら結果は毎回一致するが、
+NumPyは乱数（binomial / multinomialなど）の系列をバージョン間で保証しない。そのため基準値には作成時の
+NumPyのバージョンを記録し、バージョンが異なる環境では警告を出したうえで標準誤差に基づく許容幅で比較する。
+速度・メモリは環境に依存するため、結果はマシンごとにJSONで保存し、同じマシンの結果同士で比較する。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from vvv import GAME_DATA, HINT_DATA
+from vvv.batch import predict_setting_batch
+from vvv.cache import LikelihoodCache, LikelihoodTable, build_likelihood_table
+from vvv.decision import QuitDecision
+from vvv.estimator import COMPILED_GAME_DATA, SETTINGS, calculate_likelihood, poisson_log_likelihoods, predict_setting, setting_log_likelihoods
+from vvv.session import SessionPosterior
+from vvv.simulator import simulate_sessions
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+ACCURACY_BASELINE = os.path.join(BENCHMARK_DIR, "accuracy_baseline.json")
+
+BATCH_SIZES = (1000, 10000, 100000)
+MEMORY_BATCH_SIZES = (10000, 100000)
+ACCURACY_GAME_COUNTS = (1000, 3000, 8000)
+ACCURACY_SESSIONS_PER_SETTING = 2000
+ACCURACY_SEED = 20240101
+ACCURACY_METRICS = ("accuracy", "log_loss", "brier")
+ACCURACY_TOLERANCE = 1e-6 # 同じNumPyのバージョンでの許容差
+ACCURACY_SIGMAS = 4.0 # NumPyのバージョンが異なる場合の許容幅（差の標準誤差の何倍まで許すか）
+DEFAULT_SLOWDOWN_LIMIT = 1.5 # これ以上遅くなったら回帰とみなす倍率
+
+TYPICAL_INPUTS = {
+    'total_game_count': 3000, 'at_first_hit_count': 7, 'cz_total_count': 11,
+    'cz_kyoutou_v_challenge_count': 11, 'cz_kyoutou_v_challenge_total_count': 3000,
+    'harikiri_drive_count': 1, 'harikiri_drive_total_count': 7,
+    'total_ssr_sets': 10, 'ssr_10g_count': 5, 'ssr_20g_count': 4, 'ssr_50g_count': 1, 'ssr_100g_count': 0,
+    'yurikuukan_cut_hd_count': 1, 'yurikuukan_cut_total_count': 2,
+    'mode_total_count': 3, 'mode_observed_counts': {'モードA': 1, 'モードB': 2, 'モードC': 0, 'モードD': 0},
+    'hints_observed_counts': {"CZボーナス終了画面_白[2人]": 4, "CZボーナス終了画面_白[4人]": 1},
+}
+
+LONG_SESSION_INPUTS = {
+    **TYPICAL_INPUTS,
+    'total_game_count': 8000, 'at_first_hit_count': 17, 'cz_kyoutou_v_challenge_total_count': 8000, 'cz_kyoutou_v_challenge_count': 30,
+    'hints_observed_counts': {hint_key: 3 for hint_key in HINT_DATA},
+}
+
+
+# --- 速度 ---
+def _time_call(function, repeat=5):
+    """1回あたりの実行時間（秒）の最小値と中央値を返す。"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {"min": min(times), "median": statistics.median(times), "number": number}
+
+
+def _batch_table(row_count, seed=0):
+    rng = np.random.default_rng(seed)
+    tables = [simulate_sessions(setting, 3000, row_count // len(SETTINGS) + 1, rng) for setting in SETTINGS]
+
+    def concatenate(values):
+        if isinstance(values[0], dict):
+            return {key: concatenate([value[key] for value in values]) for key in values[0]}
+        return np.concatenate(values)[:row_count]
+
+    return {key: concatenate([table[key] for table in tables]) for key in tables[0]}
+
+
+def run_timings():
+    rate = GAME_DATA["ボーナス初当り確率"][6]
+    cache = LikelihoodCache()
+    cache.setting_log_likelihoods(TYPICAL_INPUTS)
+    decision = QuitDecision()
+    log_likelihoods = setting_log_likelihoods(TYPICAL_INPUTS).tolist()
+
+    def session_updates():
+        session = SessionPosterior()
+        for game_count in range(100, 10100, 100):
+            session.update("bonus", game_count)
+
+    timings = {
+        "calculate_likelihood": _time_call(lambda: calculate_likelihood(7, 3000, rate, is_probability_rate=False)),
+        "predict_setting_typical": _time_call(lambda: predict_setting(TYPICAL_INPUTS)),
+        "predict_setting_long_session": _time_call(lambda: predict_setting(LONG_SESSION_INPUTS)),
+        "predict_setting_cache_hit": _time_call(lambda: predict_setting(TYPICAL_INPUTS, cache=cache)),
+        "predict_setting_instrumented": _time_call(lambda: predict_setting(TYPICAL_INPUTS, instrument=lambda report: None)),
+        "session_update_100_events": _time_call(session_updates),
+        "quit_decision_evaluate": _time_call(lambda: decision.evaluate(log_likelihoods)),
+    }
+    for row_count in BATCH_SIZES:
+        table = _batch_table(row_count)
+        timings[f"predict_setting_batch_{row_count}"] = _time_call(lambda: predict_setting_batch(table), repeat=3)
+
+    # 事前計算テーブル（python -m vvv.cache build）を使った場合との比較
+    observed = [TYPICAL_INPUTS.get(key, 0) for key in COMPILED_GAME_DATA["observed_keys"]]
+    trials = [TYPICAL_INPUTS.get(key, 0) for key in COMPILED_GAME_DATA["trial_keys"]]
+    with tempfile.TemporaryDirectory() as directory:
+        build_likelihood_table(directory)
+        likelihood_table = LikelihoodTable(directory)
+        timings["poisson_log_likelihoods"] = _time_call(lambda: poisson_log_likelihoods(observed, trials))
+        timings["poisson_log_likelihoods_table"] = _time_call(lambda: likelihood_table.poisson_log_likelihoods(observed, trials))
+        table = _batch_table(BATCH_SIZES[-1])
+        timings[f"predict_setting_batch_{BATCH_SIZES[-1]}_table"] = _time_call(
+            lambda: predict_setting_batch(table, likelihood_table=likelihood_table), repeat=3
+        )
+        del likelihood_table # Windowsではメモリマップを閉じないとディレクトリを削除できない
+    return timings
+
+
+# --- メモリ ---
+def run_memory():
+    """大きなバッチ実行時のピークメモリ（入力テーブルを除く増分、バイト）。"""
+    memory = {}
+    for row_count in MEMORY_BATCH_SIZES:
+        table = _batch_table(row_count)
+        tracemalloc.start()
+        predict_setting_batch(table)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory[f"predict_setting_batch_{row_count}"] = peak
+    return memory
+
+
+# --- 精度 ---
+def run_accuracy():
+    """
+    固定シードの模擬データに対する正解率・対数損失・ブライアスコアと、それぞれの標準誤差。
+    """
+    accuracy = {}
+    seed_sequences = iter(np.random.SeedSequence(ACCURACY_SEED).spawn(len(ACCURACY_GAME_COUNTS) * len(SETTINGS)))
+    for game_count in ACCURACY_GAME_COUNTS:
+        losses = {name: [] for name in ACCURACY_METRICS} # セッションごとの値
+        for setting in SETTINGS:
+            rng = np.random.default_rng(next(seed_sequences))
+            posteriors, predicted_settings = predict_setting_batch(simulate_sessions(setting, game_count, ACCURACY_SESSIONS_PER_SETTING, rng))
+            valid = predicted_settings > 0
+            posteriors = posteriors[valid]
+            truth = np.zeros(len(SETTINGS))
+            truth[setting - SETTINGS[0]] = 1.0
+
+            losses["accuracy"].append(predicted_settings[valid] == setting)
+            losses["log_loss"].append(-np.log(np.maximum(posteriors[:, setting - SETTINGS[0]], 1e-300)))
+            losses["brier"].append(np.sum((posteriors - truth) ** 2, axis=-1))
+
+        losses = {name: np.concatenate(values).astype(float) for name, values in losses.items()}
+        scored = len(losses["accuracy"])
+        accuracy[str(game_count)] = {
+            **{name: float(np.mean(values)) for name, values in losses.items()},
+            "sessions": scored,
+            "standard_error": {name: float(np.std(values, ddof=1) / np.sqrt(scored)) for name, values in losses.items()},
+        }
+    return accuracy
+
+
+# --- 比較 ---
+def compare_timings(current, previous, slowdown_limit):
+    """前回より slowdown_limit 倍以上遅くなった項目のメッセージを返す。"""
+    regressions = []
+    for name, timing in current.items():
+        if name in previous and timing["min"] > previous[name]["min"] * slowdown_limit:
+            regressions.append(f"{name}: {previous[name]['min'] * 1e6:.1f}us -> {timing['min'] * 1e6:.1f}us")
+    return regressions
+
+
+def compare_accuracy(current, baseline, same_numpy=True):
+    """
+    基準値から変わった精度指標のメッセージを返す。
+    same_numpy: 基準値と同じNumPyのバージョンか。Falseなら乱数の系列が違うため、
+                差が標準誤差のACCURACY_SIGMAS倍以内なら変化なしとみなす（セッション数は比較しない）。
+    """
+    changes = []
+    for game_count, metrics in baseline.items():
+        current_metrics = current.get(game_count, {})
+        for name in (*ACCURACY_METRICS, "sessions") if same_numpy else ACCURACY_METRICS:
+            value = metrics[name]
+            current_value = current_metrics.get(name)
+            if current_value is None:
+                changes.append(f"{game_count}G {name}: {value} -> {current_value}")
+                continue
+            if same_numpy:
+                tolerance = ACCURACY_TOLERANCE
+            else:
+                tolerance = ACCURACY_SIGMAS * np.hypot(metrics["standard_error"][name], current_metrics["standard_error"][name])
+            if abs(current_value - value) > tolerance:
+                changes.append(f"{game_count}G {name}: {value} -> {current_value}")
+    return changes
+
+
+def check_accuracy_baseline(accuracy, path=ACCURACY_BASELINE):
+    """基準値ファイルと比較し、変化した精度指標のメッセージを返す。NumPyのバージョンが違えば警告を出す。"""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    same_numpy = baseline["numpy"] == np.__version__
+    if not same_numpy:
+        print(f"警告: 精度の基準値はNumPy {baseline['numpy']}で作成されています（この環境は{np.__version__}）。"
+              f"乱数の系列が異なるため、標準誤差の{ACCURACY_SIGMAS:g}倍の許容幅で比較します。", file=sys.stderr)
+    return compare_accuracy(accuracy, baseline["game_counts"], same_numpy)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="推測エンジンのベンチマークを実行します。")
+    parser.add_argument("--compare", help="比較する以前の結果ファイル")
+    parser.add_argument("--slowdown-limit", type=float, default=DEFAULT_SLOWDOWN_LIMIT)
+    parser.add_argument("--check-accuracy", action="store_true", help="精度のみ計測し、基準値と比較する")
+    parser.add_argument("--update-accuracy", action="store_true", help="精度の基準値ファイルを書き換える")
+    args = parser.parse_args(argv)
+
+    accuracy = run_accuracy()
+    if args.update_accuracy:
+        with open(ACCURACY_BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"numpy": np.__version__, "game_counts": accuracy}, f, indent=2)
+            f.write("\n")
+        print(f"精度の基準値を更新しました: {ACCURACY_BASELINE}")
+        return 0
+
+    accuracy_changes = check_accuracy_baseline(accuracy)
+    if args.check_accuracy:
+        for change in accuracy_changes:
+            print(f"精度が変化しました: {change}")
+        return 1 if accuracy_changes else 0
+
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor(), "numpy": np.__version__},
+        "timings": run_timings(),
+        "peak_memory": run_memory(),
+        "accuracy": accuracy,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_path = os.path.join(RESULTS_DIR, f"{results['timestamp'].replace(':', '')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for name, timing in results["timings"].items():
+        print(f"{name:40s} {timing['min'] * 1e6:12.1f} us")
+    for name, peak in results["peak_memory"].items():
+        print(f"{name:40s} {peak / 2**20:12.1f} MiB (peak)")
+    print(f"結果を保存しました: {output_path}")
+
+    failures = [f"精度が変化しました: {change}" for change in accuracy_changes]
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            failures += [f"遅くなりました: {regression}" for regression in compare_timings(results["timings"], json.load(f)["timings"], args.slowdown_limit)]
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
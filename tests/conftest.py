@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+
+# スペック表の変換結果をホームディレクトリに書かないよう、vvvをimportする前に保存先を変える
+os.environ.setdefault("VVV_CACHE_DIR", tempfile.mkdtemp(prefix="vvv-test-cache-"))
+
+import numpy as np
+import pytest
+
+from vvv.data import HINT_DATA
+from vvv.estimator import MODE_KEYS, SETTINGS
+from vvv.session import (
+    BONUS_COUNT_KEYS,
+    EVENT_BONUS,
+    EVENT_CZ,
+    EVENT_CZ_KYOUTOU_V_CHALLENGE,
+    EVENT_GAME,
+    EVENT_HARIKIRI_DRIVE_LOTTERY,
+    EVENT_HINT,
+    EVENT_MODE,
+    EVENT_SSR_SET,
+    EVENT_YURIKUUKAN_CUT,
+    SSR_COUNT_KEYS,
+)
+from vvv.simulator import simulate_sessions
+
+
+def _random_inputs(rng):
+    """predict_settingに渡す入力データをランダムに1件作る（0件・矛盾した値も含む）。"""
+    game_count = rng.choice([0, rng.randint(1, 12000)])
+    return {
+        'total_game_count': game_count, 'at_first_hit_count': rng.randint(0, 40), 'cz_total_count': rng.randint(0, 30),
+        'cz_kyoutou_v_challenge_count': rng.randint(0, 40), 'cz_kyoutou_v_challenge_total_count': rng.choice([0, game_count]),
+        'harikiri_drive_count': rng.randint(0, 5), 'harikiri_drive_total_count': rng.randint(0, 20),
+        'total_ssr_sets': rng.randint(0, 30), 'ssr_10g_count': rng.randint(0, 15), 'ssr_20g_count': rng.randint(0, 10),
+        'ssr_50g_count': rng.randint(0, 3), 'ssr_100g_count': rng.randint(0, 3),
+        'yurikuukan_cut_hd_count': rng.randint(0, 3), 'yurikuukan_cut_total_count': rng.randint(0, 5),
+        'mode_total_count': rng.randint(0, 10), 'mode_observed_counts': {mode_char: rng.randint(0, 5) for mode_char in MODE_KEYS},
+        'hints_observed_counts': {hint_key: rng.choice([0, 0, 0, 1, 2]) for hint_key in HINT_DATA},
+    }
+
+
+def _random_events(rng, event_count):
+    """(イベント種別, ゲーム数, detail) をゲーム数の順にランダムに作る。"""
+    choices = [
+        (EVENT_GAME, lambda: None),
+        (EVENT_BONUS, lambda: rng.choice(list(BONUS_COUNT_KEYS))),
+        (EVENT_CZ, lambda: None),
+        (EVENT_CZ_KYOUTOU_V_CHALLENGE, lambda: None),
+        (EVENT_HARIKIRI_DRIVE_LOTTERY, lambda: rng.random() < 0.2),
+        (EVENT_SSR_SET, lambda: rng.choice(list(SSR_COUNT_KEYS))),
+        (EVENT_YURIKUUKAN_CUT, lambda: rng.random() < 0.5),
+        (EVENT_MODE, lambda: rng.choice(MODE_KEYS)),
+        (EVENT_HINT, lambda: rng.choice(list(HINT_DATA))),
+    ]
+    game_count = 0
+    events = []
+    for _ in range(event_count):
+        game_count += rng.randint(0, 60)
+        event_type, make_detail = rng.choice(choices)
+        events.append((event_type, game_count, make_detail()))
+    return events
+
+
+def _table_row(table, row):
+    """列名→配列のdictから1行分の入力データを取り出す。"""
+    return {
+        key: {nested_key: int(column[row]) for nested_key, column in value.items()} if isinstance(value, dict) else int(value[row])
+        for key, value in table.items()
+    }
+
+
+@pytest.fixture
+def random_input_list():
+    rng = random.Random(20240101)
+    return [_random_inputs(rng) for _ in range(300)]
+
+
+@pytest.fixture
+def random_events():
+    """random_events(seed, event_count) でイベント列を作る関数。"""
+    return lambda seed, event_count: _random_events(random.Random(seed), event_count)
+
+
+@pytest.fixture
+def table_row():
+    return _table_row
+
+
+@pytest.fixture
+def simulated_table():
+    """全設定の模擬セッションを混ぜた列名→配列のdict。"""
+    rng = np.random.default_rng(0)
+    tables = [simulate_sessions(setting, 3000, 50, rng) for setting in SETTINGS]
+
+    def concatenate(values):
+        if isinstance(values[0], dict):
+            return {key: concatenate([value[key] for value in values]) for key in values[0]}
+        return np.concatenate(values)
+
+    return {key: concatenate([table[key] for table in tables]) for key in tables[0]}
@@ -0,0 +1,18 @@
+import numpy as np
+
+from vvv.batch import predict_setting_batch
+from vvv.estimator import SETTINGS, posterior_probabilities, setting_log_likelihoods
+
+
+def test_batch_matches_single_rows(simulated_table, table_row):
+    posteriors, predicted_settings = predict_setting_batch(simulated_table, chunk_size=64)
+    for row in range(len(predicted_settings)):
+        log_likelihoods = setting_log_likelihoods(table_row(simulated_table, row))
+        np.testing.assert_allclose(posteriors[row], posterior_probabilities(log_likelihoods), rtol=1e-12, atol=1e-15)
+        assert predicted_settings[row] == np.argmax(log_likelihoods) + SETTINGS[0]
+
+
+def test_batch_skips_rows_without_data():
+    posteriors, predicted_settings = predict_setting_batch({'total_game_count': np.array([0, 3000]), 'at_first_hit_count': np.array([0, 6])})
+    assert predicted_settings[0] == 0 and np.all(np.isnan(posteriors[0]))
+    assert predicted_settings[1] in SETTINGS
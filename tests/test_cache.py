@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+from vvv.cache import TABLE_MANIFEST, LikelihoodCache, LikelihoodTable, build_likelihood_table
+from vvv.data import HINT_DATA
+from vvv.estimator import (
+    COMPILED_GAME_DATA,
+    compile_hint_data,
+    machine_tables,
+    poisson_log_likelihoods,
+    predict_setting,
+    setting_log_likelihoods,
+)
+
+SMALL_GRID = {
+    "denominator": {"max_trials": 300, "max_hits": 7},
+    "probability": {"max_trials": 12, "max_hits": 9},
+}
+
+
+@pytest.fixture
+def small_table(tmp_path):
+    build_likelihood_table(str(tmp_path), SMALL_GRID)
+    return LikelihoodTable(str(tmp_path))
+
+
+def test_table_layout(small_table, tmp_path):
+    with open(tmp_path / TABLE_MANIFEST, encoding="utf-8") as f:
+        manifest = json.load(f)
+    sizes = [trials * hits for trials, hits in manifest["shapes"]]
+    assert manifest["offsets"] == [sum(sizes[:i]) for i in range(len(sizes))]
+    assert small_table.values.shape == (sum(sizes), 6)
+
+
+def test_table_matches_direct_computation(small_table):
+    rng = np.random.default_rng(5)
+    # 格子の内側・外側（上限ちょうど・負・非整数）を混ぜる
+    observed = rng.integers(-1, 12, size=(500, len(COMPILED_GAME_DATA["observed_keys"]))).astype(float)
+    trials = rng.integers(-1, 320, size=observed.shape).astype(float)
+    trials[::7, 0] = 300.5
+    observed[::11, 1] = 8
+    expected = poisson_log_likelihoods(observed, trials)
+
+    np.testing.assert_allclose(small_table.poisson_log_likelihoods(observed, trials), expected, rtol=1e-12)
+    assert small_table.hits > 0 and small_table.misses > 0
+    assert small_table.hits + small_table.misses == observed.size
+    for row in range(20): # 1件分の経路
+        np.testing.assert_allclose(small_table.poisson_log_likelihoods(observed[row], trials[row]), expected[row], rtol=1e-12)
+
+
+def test_table_rejects_other_spec(tmp_path):
+    build_likelihood_table(str(tmp_path), SMALL_GRID)
+    other = {**COMPILED_GAME_DATA, "per_trial": COMPILED_GAME_DATA["per_trial"] * 1.01}
+    with pytest.raises(ValueError, match="一致しません"):
+        LikelihoodTable(str(tmp_path), other)
+
+
+def test_cache_lru_counters():
+    cache = LikelihoodCache(maxsize=2)
+    inputs = [{'total_game_count': 3000, 'at_first_hit_count': hits} for hits in (4, 6, 8)]
+
+    np.testing.assert_array_equal(cache.setting_log_likelihoods(inputs[0]), setting_log_likelihoods(inputs[0]))
+    cache.setting_log_likelihoods(inputs[1])
+    cache.setting_log_likelihoods({**inputs[0], 'cz_total_count': 0}) # 結果に影響しない項目は同じキー
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 2, "maxsize": 2}
+
+    cache.setting_log_likelihoods(inputs[2]) # 最も古いinputs[1]が追い出される
+    cache.setting_log_likelihoods(inputs[0])
+    cache.setting_log_likelihoods(inputs[1])
+    assert cache.stats() == {"hits": 2, "misses": 4, "size": 2, "maxsize": 2}
+    with pytest.raises(ValueError):
+        cache.setting_log_likelihoods(inputs[0])[0] = 0.0
+
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 2}
+
+
+def test_cache_with_table(small_table):
+    cache = LikelihoodCache(table=small_table)
+    data_inputs = {'total_game_count': 250, 'at_first_hit_count': 2, 'harikiri_drive_count': 1, 'harikiri_drive_total_count': 3}
+    np.testing.assert_allclose(cache.setting_log_likelihoods(data_inputs), setting_log_likelihoods(data_inputs), rtol=1e-12)
+    assert cache.stats()["table_hits"] > 0
+
+
+def test_cache_uses_its_hint_table():
+    hint_data = {**HINT_DATA, "CZボーナス終了画面_白[2人]": {"type": "exact_setting", "setting": 1, "value_multiplier": 2.0}}
+    compiled_hints = compile_hint_data(hint_data)
+    data_inputs = {'total_game_count': 3000, 'at_first_hit_count': 6, 'hints_observed_counts': {"CZボーナス終了画面_白[2人]": 3}}
+
+    cache = LikelihoodCache(compiled_hints=compiled_hints)
+    expected = setting_log_likelihoods(data_inputs, COMPILED_GAME_DATA, compiled_hints)
+    np.testing.assert_array_equal(cache.setting_log_likelihoods(data_inputs), expected)
+    assert not np.allclose(expected, setting_log_likelihoods(data_inputs))
+
+    assert predict_setting(data_inputs, cache=LikelihoodCache(compiled=machine_tables()[0], compiled_hints=machine_tables()[1]), machine="valvrave")
+    with pytest.raises(ValueError, match="valvrave"):
+        predict_setting(data_inputs, cache=cache, machine="valvrave")
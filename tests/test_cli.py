@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+from vvv.cli import estimate_records, main
+
+
+def test_estimate_records_keeps_valid_rows():
+    results = estimate_records([
+        {"id": 1, "total_game_count": 3000, "at_first_hit_count": 6},
+        {"id": 2, "total_game_count": "abc"},
+        {"id": 3, "total_game_count": 0},
+    ])
+    assert results[0]["id"] == 1 and results[0]["predicted_setting"] in range(1, 7)
+    assert results[1] == {"id": 2, "error": "total_game_countが数値ではありません: 'abc'"}
+    assert results[2] == {"id": 3, "predicted_setting": None, "posterior": None}
+
+
+@pytest.mark.parametrize("text", ['{}', '{"id": 1}'])
+def test_main_scores_records_without_columns(text, capsys, monkeypatch):
+    """数値の列が1つもないレコードもnullの推測結果を1行出力する。"""
+    monkeypatch.setattr("sys.stdin", io.StringIO(text + "\n"))
+    main([])
+    (result,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert result["predicted_setting"] is None and result["posterior"] is None
+    assert result.get("id") == json.loads(text).get("id")
+
+
+def test_main_scores_id_only_csv(tmp_path, capsys):
+    path = tmp_path / "observations.csv"
+    path.write_text("id\nx\ny\n", encoding="utf-8")
+    main([str(path)])
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert results == [{"id": "x", "predicted_setting": None, "posterior": None}, {"id": "y", "predicted_setting": None, "posterior": None}]
+
+
+@pytest.mark.parametrize("option, message", [
+    (["--machine", "no-such-machine"], "vvv-estimate: スペック表が見つかりません: no-such-machine"),
+    (["--likelihood-table", "no-such-directory"], "vvv-estimate: 事前計算テーブルを読み込めません"),
+])
+def test_main_rejects_bad_options(option, message, tmp_path):
+    path = tmp_path / "observations.jsonl"
+    path.write_text('{"total_game_count": 3000}\n', encoding="utf-8")
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(path), *option])
+    assert exit_info.value.code.startswith(message)
+
+
+def test_main_reports_bad_line(tmp_path, capsys):
+    path = tmp_path / "observations.jsonl"
+    path.write_text('{"id": "a", "total_game_count": 3000}\nnot json\n{"id": "c", "total_game_count": 1000}\n', encoding="utf-8")
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(path)])
+    assert exit_info.value.code == f"vvv-estimate: 推測できない入力があります（{path}:2: レコードとして読み込めません）"
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line.get("id") for line in lines] == ["a", None, "c"]
+    assert "error" in lines[1] and lines[2]["predicted_setting"] in range(1, 7)
+
+
+def test_main_reads_csv(tmp_path, capsys):
+    path = tmp_path / "observations.csv"
+    path.write_text("id,total_game_count,at_first_hit_count,モードA\nx,3000,6,1\n", encoding="utf-8")
+    main([str(path)])
+    (result,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert result["id"] == "x" and len(result["posterior"]) == 6
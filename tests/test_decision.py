@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from vvv.decision import ACTION_KEEP, ACTION_NEED_MORE_GAMES, ACTION_QUIT, MAX_GAMES_NEEDED, QuitDecision
+from vvv.session import SessionPosterior
+
+
+@pytest.fixture
+def decision():
+    return QuitDecision(alpha=0.05, beta=0.05)
+
+
+def test_thresholds(decision):
+    assert decision.keep_threshold == pytest.approx(math.log(0.95 / 0.05))
+    assert decision.quit_threshold == pytest.approx(math.log(0.05 / 0.95))
+    assert decision.high_information_per_game > 0 and decision.low_information_per_game > 0
+
+
+def test_empty_session_needs_more_games(decision):
+    result = decision.evaluate_session(SessionPosterior())
+    assert result["action"] == ACTION_NEED_MORE_GAMES
+    assert result["log_likelihood_ratio"] == pytest.approx(0.0)
+    assert result["probability_high"] == pytest.approx(0.5) and result["probability_low"] == pytest.approx(1 / 3)
+    assert result["games_needed"] is None or 0 < result["games_needed"] <= MAX_GAMES_NEEDED
+
+
+@pytest.mark.parametrize("log_likelihoods, action", [([0.0, 0.0, 0.0, 4.0, 4.0, 4.0], ACTION_KEEP), ([4.0, 4.0, 0.0, 0.0, 0.0, 0.0], ACTION_QUIT)])
+def test_clear_data_decides(decision, log_likelihoods, action):
+    result = decision.evaluate(log_likelihoods)
+    assert result["action"] == action
+    assert result["games_needed"] == 0
+    assert abs(result["log_likelihood_ratio"]) == pytest.approx(4.0)
+    if action == ACTION_KEEP:
+        assert result["probability_high"] > 0.9 and result["expected_coin_difference"] > 0
+    else:
+        assert result["probability_low"] > 0.9 and result["expected_coin_difference"] < 0
+
+
+def test_games_needed_shrinks_with_evidence(decision):
+    results = [decision.evaluate([0.0, 0.0, 0.0, llr, llr, llr]) for llr in (0.5, 1.5, 2.5)]
+    assert all(result["action"] == ACTION_NEED_MORE_GAMES for result in results)
+    games_needed = [result["games_needed"] for result in results]
+    assert all(isinstance(games, int) and 0 < games <= MAX_GAMES_NEEDED for games in games_needed)
+    assert games_needed == sorted(games_needed, reverse=True)
+
+
+def test_games_needed_uses_per_bonus_params():
+    few = QuitDecision(params={"harikiri_drive_lotteries_per_bonus": 0.0, "ssr_sets_per_bonus": 0.0, "yurikuukan_cuts_per_bonus": 0.0})
+    many = QuitDecision(params={"harikiri_drive_lotteries_per_bonus": 5.0, "ssr_sets_per_bonus": 5.0, "yurikuukan_cuts_per_bonus": 5.0})
+    assert few.high_information_per_game < many.high_information_per_game
+    assert few.low_information_per_game < many.low_information_per_game
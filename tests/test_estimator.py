@@ -0,0 +1,77 @@
+import numpy as np
+
+from vvv.data import GAME_DATA, HINT_DATA
+from vvv.estimator import SETTINGS, calculate_likelihood, posterior_probabilities, predict_setting, setting_log_likelihoods
+
+
+# 示唆タイプ → (対象設定か判定する関数, value_multiplierの既定値, exclude_multiplierの既定値)
+REFERENCE_HINT_RULES = {
+    "even_settings": (lambda setting, info: setting in info["settings"], 1.0, 1e-3),
+    "odd_settings": (lambda setting, info: setting in info["settings"], 1.0, 1e-3),
+    "high_settings": (lambda setting, info: setting in info["settings"], 1.0, 1e-3),
+    "min_setting": (lambda setting, info: setting >= info["setting"], 1.0, 1e-3),
+    "exact_setting": (lambda setting, info: setting == info["setting"], 1.0, 1e-10),
+    "exclude_setting": (lambda setting, info: setting in info["settings"], 1e-10, 1.0),
+}
+
+
+def reference_probabilities(data_inputs):
+    """ベクトル化前の推測ロジック（calculate_likelihoodを設定ごとに掛け合わせる）による各設定の確率。"""
+    likelihoods = {setting: 1.0 for setting in SETTINGS}
+
+    def multiply(metric_key, observed_key, trial_key, is_probability_rate):
+        if data_inputs.get(trial_key, 0) > 0 and data_inputs.get(observed_key, 0) >= 0:
+            for setting, rate in GAME_DATA[metric_key].items():
+                likelihoods[setting] *= calculate_likelihood(data_inputs[observed_key], data_inputs[trial_key], rate, is_probability_rate)
+
+    multiply("ボーナス初当り確率", 'at_first_hit_count', 'total_game_count', False)
+    multiply("CZ_共闘Vチャレンジ_出現率", 'cz_kyoutou_v_challenge_count', 'cz_kyoutou_v_challenge_total_count', False)
+    multiply("ハラキリドライブ発生率", 'harikiri_drive_count', 'harikiri_drive_total_count', True)
+    if data_inputs.get('total_ssr_sets', 0) > 0:
+        for game_type in ("10G", "20G", "50G", "100G"):
+            count = data_inputs.get(f'ssr_{game_type.lower()}_count', 0)
+            if count > 0:
+                for setting in SETTINGS:
+                    rate = GAME_DATA[f"超革命ラッシュ_セットゲーム_{game_type}"][setting]
+                    likelihoods[setting] *= calculate_likelihood(count, data_inputs['total_ssr_sets'], rate, True)
+    multiply("有利区間切断時ハラキリドライブ発生率", 'yurikuukan_cut_hd_count', 'yurikuukan_cut_total_count', True)
+
+    mode_total_count = data_inputs.get('mode_total_count', 0)
+    if mode_total_count > 0:
+        for mode_char, observed_count in data_inputs.get('mode_observed_counts', {}).items():
+            if observed_count > 0:
+                observed_ratio = observed_count / mode_total_count
+                for setting in SETTINGS:
+                    expected_rate = GAME_DATA[f"通常時モード比率_{mode_char}"][setting]
+                    likelihood = 1.0 - abs(observed_ratio - expected_rate) / max(observed_ratio, expected_rate, 0.001)
+                    likelihoods[setting] *= max(likelihood, 1e-5) ** 0.25
+
+    for hint_key, observed_count in data_inputs.get('hints_observed_counts', {}).items():
+        hint_info = HINT_DATA.get(hint_key)
+        if observed_count <= 0 or hint_info is None or hint_info["type"] == "normal":
+            continue
+        is_target, default_value, default_exclude = REFERENCE_HINT_RULES[hint_info["type"]]
+        for setting in SETTINGS:
+            if is_target(setting, hint_info):
+                multiplier = hint_info.get("value_multiplier", default_value)
+            else:
+                multiplier = hint_info.get("exclude_multiplier", default_exclude)
+            likelihoods[setting] *= multiplier ** observed_count
+
+    total = sum(likelihoods.values())
+    return np.array([likelihoods[setting] / total for setting in SETTINGS])
+
+
+def test_engine_matches_reference(random_input_list):
+    compared = 0
+    for data_inputs in random_input_list:
+        expected = reference_probabilities(data_inputs)
+        if not np.all(np.isfinite(expected)):
+            continue # 掛け算ではアンダーフローする入力は比較しない
+        np.testing.assert_allclose(posterior_probabilities(setting_log_likelihoods(data_inputs)), expected, rtol=1e-9, atol=1e-12)
+        compared += 1
+    assert compared > len(random_input_list) // 2
+
+
+def test_predict_setting_without_data():
+    assert predict_setting({'total_game_count': 0}).startswith("データが入力されていません")
@@ -0,0 +1,17 @@
+import pytest
+
+from vvv.data import HINT_DATA
+from vvv.estimator import compile_hint_data, hint_multipliers
+
+
+@pytest.mark.parametrize("hint_info, message", [
+    ({"type": "even_setting", "settings": [2, 4, 6]}, "タイプが不正"),
+    ({"type": "min_setting", "settings": [4]}, '"setting"がありません'),
+    ({"type": "high_settings", "settings": [4, 5, 7]}, "存在しない設定"),
+    ({"type": "exact_setting", "setting": 6, "exclude_multiplier": 0}, "正の数"),
+])
+def test_hint_rule_errors(hint_info, message):
+    with pytest.raises(ValueError, match=message):
+        hint_multipliers("テスト示唆", hint_info)
+    with pytest.raises(ValueError, match="テスト示唆"):
+        compile_hint_data({**HINT_DATA, "テスト示唆": hint_info})
@@ -0,0 +1,18 @@
+import numpy as np
+
+from vvv.estimator import instrumented_log_likelihoods, predict_setting, setting_log_likelihoods
+
+
+def test_instrumented_matches_plain(random_input_list):
+    for data_inputs in random_input_list:
+        log_likelihoods, report = instrumented_log_likelihoods(data_inputs)
+        np.testing.assert_array_equal(log_likelihoods, setting_log_likelihoods(data_inputs))
+        assert set(report["blocks"]) == {"bonus", "cz_kyoutou_v_challenge", "harikiri_drive", "ssr_sets", "yurikuukan_cut", "mode", "hints"}
+
+
+def test_predict_setting_instrument_callback():
+    reports = []
+    data_inputs = {'total_game_count': 3000, 'at_first_hit_count': 6}
+    assert predict_setting(data_inputs, instrument=reports.append) == predict_setting(data_inputs)
+    (report,) = reports
+    assert report["predicted_setting"] in range(1, 7) and abs(sum(report["posterior"]) - 1.0) < 1e-9
@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pytest
+
+from vvv import registry
+from vvv.registry import SPEC_FORMAT_VERSION, available_machines, compiled_spec, load_spec, validate_spec
+
+
+def _raw_spec(**changes):
+    raw = {
+        "format_version": SPEC_FORMAT_VERSION,
+        "machine": "toy",
+        "name": "テスト機",
+        "spec_version": "1",
+        "settings": [1, 2, 3],
+        "game_data": {"ボーナス初当り確率": [300.0, 280.0, 250.0]},
+        "hint_data": {"示唆A": {"type": "exact_setting", "setting": 3, "value_multiplier": 2.0}},
+    }
+    raw.update(changes)
+    return raw
+
+
+@pytest.fixture
+def spec_dir(tmp_path, monkeypatch):
+    """toy機種のスペック表を置いたディレクトリ。変換結果の保存先もtmp_pathの下にする。"""
+    monkeypatch.setenv("VVV_CACHE_DIR", str(tmp_path / "cache"))
+    directory = tmp_path / "specs"
+    directory.mkdir()
+    (directory / "toy.json").write_text(json.dumps(_raw_spec(), ensure_ascii=False), encoding="utf-8")
+    return str(directory)
+
+
+def test_validate_spec_converts_rows():
+    spec = validate_spec(_raw_spec())
+    assert spec["settings"] == (1, 2, 3)
+    assert spec["game_data"]["ボーナス初当り確率"] == {1: 300.0, 2: 280.0, 3: 250.0}
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"format_version": 99}, "対応していない形式"),
+    ({"name": ""}, "nameがありません"),
+    ({"settings": [1, 1, 2]}, "settingsは重複のない整数"),
+    ({"settings": []}, "settingsは重複のない整数"),
+    ({"game_data": {"ボーナス初当り確率": [300.0, 280.0]}}, "設定の数（3個）"),
+    ({"game_data": {"ボーナス初当り確率": [300.0, -1.0, 250.0]}}, "0以上の数値"),
+    ({"game_data": {"ボーナス初当り確率": [300.0, True, 250.0]}}, "0以上の数値"),
+    ({"game_data": {}}, "game_dataがありません"),
+    ({"hint_data": {"示唆A": {"setting": 3}}}, "typeがありません"),
+    ({"hint_data": {"示唆A": {"type": "exact_setting", "setting": 3, "value_multiplier": 0}}}, "value_multiplierは正の数"),
+    ({"hint_data": {"示唆A": {"type": "exact_setting", "setting": 6}}}, "settingsにない設定"),
+    ({"hint_data": {"示唆A": {"type": "even_settings", "settings": [2, 4]}}}, "settingsにない設定"),
+])
+def test_validate_spec_rejects(changes, message):
+    with pytest.raises(ValueError, match=message):
+        validate_spec(_raw_spec(**changes))
+
+
+def test_load_spec(spec_dir):
+    assert available_machines(spec_dir) == ["toy"]
+    spec = load_spec("toy", spec_dir)
+    assert spec["name"] == "テスト機" and len(spec["sha256"]) == 64
+    assert load_spec("toy", spec_dir) is spec
+    with pytest.raises(ValueError, match="スペック表が見つかりません: other"):
+        load_spec("other", spec_dir)
+
+
+def test_load_spec_checks_machine_name(spec_dir):
+    with open(f"{spec_dir}/renamed.json", "w", encoding="utf-8") as f:
+        json.dump(_raw_spec(), f)
+    with pytest.raises(ValueError, match="一致しません"):
+        load_spec("renamed", spec_dir)
+
+
+def test_corrupt_compiled_cache_is_recompiled(spec_dir, tmp_path, monkeypatch):
+    calls = []
+
+    def compile_function(spec):
+        calls.append(spec["machine"])
+        return {"rates": np.array([1.0 / spec["game_data"]["ボーナス初当り確率"][s] for s in spec["settings"]]), "settings": spec["settings"]}
+
+    def compile_again():
+        monkeypatch.setattr(registry, "_compiled", {}) # 別プロセスで読み込む場合と同じく、メモリ上の結果を使わない
+        return compiled_spec("toy", "test", compile_function, 1, spec_dir)
+
+    expected = compile_again()
+    (path,) = (tmp_path / "cache").glob("toy-test-*.npz")
+    loaded = compile_again()
+    assert calls == ["toy"] # 2回目はディスクから読む
+    np.testing.assert_array_equal(loaded["rates"], expected["rates"])
+    assert loaded["settings"] == (1, 2, 3)
+
+    with open(path, "r+b") as f:
+        f.truncate(path.stat().st_size // 2)
+    np.testing.assert_array_equal(compile_again()["rates"], expected["rates"])
+    assert calls == ["toy", "toy"]
+    compile_again() # 作り直した結果は保存し直される
+    assert calls == ["toy", "toy"]
+
+    path.write_bytes(b"not a zip file")
+    compile_again()
+    assert calls == ["toy", "toy", "toy"]
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+from vvv.cli import estimate_records
+from vvv.server import serve
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(response_body)
+
+
+def test_server_round_trip():
+    records = [{"id": i, "total_game_count": 3000, "at_first_hit_count": i % 12} for i in range(20)]
+
+    async def run():
+        started = asyncio.Event()
+        ports = []
+
+        def ready(server):
+            ports.append(server.sockets[0].getsockname()[1])
+            started.set()
+
+        server_task = asyncio.create_task(serve(port=0, ready=ready))
+        await asyncio.wait_for(started.wait(), 10)
+        try:
+            single_responses = await asyncio.gather(*[_request(ports[0], "POST", "/predict", record) for record in records])
+            batch_response = await _request(ports[0], "POST", "/predict", records)
+            invalid_response = await _request(ports[0], "POST", "/predict", {"total_game_count": "abc"})
+            # 列が1つもできないレコードでもバッチャーが止まらず、後続のリクエストに答え続けること
+            empty_responses = await asyncio.wait_for(asyncio.gather(
+                _request(ports[0], "POST", "/predict", {}),
+                _request(ports[0], "POST", "/predict", {"id": 1}),
+                _request(ports[0], "POST", "/predict", [{"id": 2}, records[0]]),
+            ), 10)
+            metrics_response = await _request(ports[0], "GET", "/metrics")
+        finally:
+            server_task.cancel()
+            try:
+                await server_task
+            except asyncio.CancelledError:
+                pass
+        return single_responses, batch_response, invalid_response, empty_responses, metrics_response
+
+    single_responses, batch_response, invalid_response, empty_responses, metrics_response = asyncio.run(run())
+    expected = estimate_records(records)
+    # バッチのまとまり方で丸め誤差が変わりうるため、確率は許容差つきで比べる
+    for (status, result), expected_result in zip(single_responses, expected):
+        assert status == 200 and result["id"] == expected_result["id"]
+        assert result["posterior"] == pytest.approx(expected_result["posterior"], rel=1e-9)
+    assert batch_response[0] == 200
+    assert [result["predicted_setting"] for result in batch_response[1]] == [result["predicted_setting"] for result in expected]
+    assert invalid_response[0] == 400 and "error" in invalid_response[1]
+    assert empty_responses[0] == (200, {"predicted_setting": None, "posterior": None})
+    assert empty_responses[1] == (200, {"id": 1, "predicted_setting": None, "posterior": None})
+    assert empty_responses[2][0] == 200 and empty_responses[2][1][0] == {"id": 2, "predicted_setting": None, "posterior": None}
+    assert empty_responses[2][1][1]["predicted_setting"] == expected[0]["predicted_setting"]
+    assert metrics_response[0] == 200 and metrics_response[1]["requests"] == len(records) + 5
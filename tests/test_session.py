@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from vvv.estimator import predict_setting, setting_log_likelihoods
+from vvv.session import EVENT_BONUS, EVENT_HINT, EVENT_MODE, SessionPosterior
+
+
+def test_session_matches_predict_setting(random_events):
+    session = SessionPosterior()
+    for event_type, game_count, detail in random_events(7, 400):
+        session.update(event_type, game_count, detail)
+        data_inputs = session.data_inputs()
+        np.testing.assert_allclose(session.log_likelihoods, setting_log_likelihoods(data_inputs), rtol=1e-9, atol=1e-9)
+    assert predict_setting(session.data_inputs()).startswith("## ✨ 推測される設定: 設定")
+
+
+def test_session_snapshot_restore(random_events):
+    session = SessionPosterior()
+    events = random_events(8, 100)
+    for event_type, game_count, detail in events[:50]:
+        session.update(event_type, game_count, detail)
+    snapshot = session.snapshot()
+    expected = session.log_likelihoods.copy()
+    for event_type, game_count, detail in events[50:]:
+        session.update(event_type, game_count, detail)
+    session.restore(snapshot)
+    np.testing.assert_array_equal(session.log_likelihoods, expected)
+    assert len(session.events) == 50
+
+
+@pytest.mark.parametrize("event_type, detail", [(EVENT_BONUS, "不明"), (EVENT_MODE, "モードZ"), (EVENT_HINT, "不明な示唆"), ("unknown", None)])
+def test_session_rejects_unknown_events(event_type, detail):
+    with pytest.raises(ValueError):
+        SessionPosterior().update(event_type, 100, detail)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from vvv.estimator import SETTINGS
+from vvv.simulator import CALIBRATION_BINS, evaluate_estimator
+
+SESSIONS_PER_SETTING = 150
+
+
+@pytest.fixture(scope="module")
+def report():
+    return evaluate_estimator(3000, SESSIONS_PER_SETTING, seed=3, chunk_size=60, max_workers=2)
+
+
+def test_report_totals(report):
+    confusion_matrix = report["confusion_matrix"]
+    assert confusion_matrix.shape == (len(SETTINGS), len(SETTINGS))
+    assert np.all(confusion_matrix.sum(axis=1) <= SESSIONS_PER_SETTING)
+    assert report["calibration"]["count"].sum() == confusion_matrix.sum()
+    assert report["accuracy"] == pytest.approx(np.trace(confusion_matrix) / confusion_matrix.sum())
+    assert 1.0 / len(SETTINGS) < report["accuracy"] <= 1.0
+
+
+def test_calibration_bins(report):
+    calibration = report["calibration"]
+    assert len(calibration["bin_edges"]) == CALIBRATION_BINS + 1
+    filled = calibration["count"] > 0
+    lower, upper = calibration["bin_edges"][:-1][filled], calibration["bin_edges"][1:][filled]
+    assert np.all((lower <= calibration["mean_confidence"][filled]) & (calibration["mean_confidence"][filled] <= upper))
+    assert np.all((0.0 <= calibration["accuracy"][filled]) & (calibration["accuracy"][filled] <= 1.0))
+
+
+def test_same_seed_same_report(report):
+    again = evaluate_estimator(3000, SESSIONS_PER_SETTING, seed=3, chunk_size=60, max_workers=1)
+    np.testing.assert_array_equal(again["confusion_matrix"], report["confusion_matrix"])
+    np.testing.assert_array_equal(again["calibration"]["count"], report["calibration"]["count"])
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from vvv.store import EVENT_RECORD_DTYPE, EVENT_TYPE_CODES, HEADER_SIZE, INDEX_SUFFIX, EventLog, EventLogWriter
+
+
+@pytest.fixture
+def event_log(tmp_path, random_events):
+    """3ホール×4台×3セッション分のイベントを書いたログのパスを返す。"""
+    path = str(tmp_path / "events.log")
+    with EventLogWriter(path) as writer:
+        for hall_id in range(3):
+            for machine_id in range(4):
+                for session_id in range(3):
+                    seed = (hall_id * 4 + machine_id) * 3 + session_id
+                    for event_type, game_count, detail in random_events(seed, 40):
+                        writer.append(hall_id, machine_id, session_id, event_type, game_count, detail)
+    return path
+
+
+def test_rescore_matches_replay(event_log):
+    log = EventLog(event_log)
+    session_keys, posteriors, predicted_settings = log.rescore()
+    assert len(session_keys) == 3 * 4 * 3
+    for session_key, posterior, predicted_setting in zip(session_keys, posteriors, predicted_settings):
+        session = log.replay(*(int(value) for value in session_key))
+        if predicted_setting == 0:
+            assert session.counts['total_game_count'] == 0
+            continue
+        np.testing.assert_allclose(posterior, session.posterior(), rtol=1e-9, atol=1e-12)
+        assert predicted_setting == session.predicted_setting()
+
+
+def test_truncated_record_is_ignored(event_log):
+    record_count = len(EventLog(event_log))
+    with open(event_log, "ab") as f:
+        f.write(b"\x00" * (EVENT_RECORD_DTYPE.itemsize // 2))
+    assert len(EventLog(event_log)) == record_count
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "not-a-log"
+    path.write_bytes(b"\x00" * HEADER_SIZE)
+    with pytest.raises(ValueError, match="イベントログではありません"):
+        EventLog(str(path))
+
+
+def test_rejects_unknown_detail(tmp_path):
+    with EventLogWriter(str(tmp_path / "events.log")) as writer:
+        with pytest.raises(ValueError, match="不明なdetail"):
+            writer.append(0, 0, 0, "hint", 100, "不明な示唆")
+
+
+def _raw_record(session_id, event_type, game_count, detail):
+    return np.array([(0, 0, session_id, game_count, event_type, detail)], dtype=EVENT_RECORD_DTYPE)
+
+
+@pytest.mark.parametrize("event_type, detail", [(EVENT_TYPE_CODES["mode"], 5), (EVENT_TYPE_CODES["hint"], 999), (99, 0)])
+def test_append_records_rejects_out_of_range(tmp_path, event_type, detail):
+    path = str(tmp_path / "events.log")
+    with EventLogWriter(path) as writer:
+        with pytest.raises(ValueError, match="不正なレコード"):
+            writer.append_records(np.concatenate([_raw_record(0, EVENT_TYPE_CODES["mode"], 10, 0), _raw_record(0, event_type, 20, detail)]))
+    assert len(EventLog(path)) == 0
+
+
+def test_out_of_range_records_do_not_leak_into_other_sessions(tmp_path):
+    path = str(tmp_path / "events.log")
+    with EventLogWriter(path) as writer:
+        writer.append(0, 0, 0, "bonus", 500, "革命")
+        writer.append(0, 0, 1, "bonus", 300, "決戦")
+    with open(path, "ab") as f: # 検証を通らない（古い・壊れた書き込み元の）レコード
+        f.write(_raw_record(0, EVENT_TYPE_CODES["mode"], 800, 5).tobytes())
+
+    log = EventLog(path)
+    session_keys, table = log.session_table()
+    assert table['mode_total_count'].tolist() == [0, 0]
+    assert table['total_game_count'].tolist() == [800, 300]
+    _, posteriors, _ = log.rescore()
+    for session_key, posterior in zip(session_keys, posteriors):
+        np.testing.assert_allclose(posterior, log.replay(*(int(value) for value in session_key)).posterior(), rtol=1e-9)
+
+
+def test_corrupt_index_is_rebuilt(event_log):
+    expected = EventLog(event_log).machine_index()
+    with open(event_log + INDEX_SUFFIX, "r+b") as f:
+        f.truncate(100)
+    machine_keys, starts, order = EventLog(event_log).machine_index()
+    np.testing.assert_array_equal(machine_keys, expected[0])
+    np.testing.assert_array_equal(order, expected[2])
+    with np.load(event_log + INDEX_SUFFIX) as saved: # 作り直した索引は保存し直される
+        assert int(saved["record_count"]) == len(EventLog(event_log))
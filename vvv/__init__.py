@@ -0,0 +1,33 @@
+"""ヴァルヴレイヴ設定判別の推測コア（Streamlitに依存しない部分）"""
+
+from .data import GAME_DATA, HINT_DATA
+
+# numpy/scipyを使う属性は最初に参照された時にimportする（起動を軽くするため）
+_LAZY_ATTRIBUTES = {
+    "SETTINGS": ".estimator",
+    "calculate_likelihood": ".estimator",
+    "compile_game_data": ".estimator",
+    "instrumented_log_likelihoods": ".estimator",
+    "machine_tables": ".estimator",
+    "posterior_probabilities": ".estimator",
+    "predict_setting": ".estimator",
+    "setting_log_likelihoods": ".estimator",
+    "predict_setting_batch": ".batch",
+    "LikelihoodCache": ".cache",
+    "LikelihoodTable": ".cache",
+    "SessionPosterior": ".session",
+    "available_machines": ".registry",
+    "load_spec": ".registry",
+}
+
+__all__ = ["GAME_DATA", "HINT_DATA", *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
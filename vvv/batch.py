@@ -0,0 +1,105 @@
+import numpy as np
+
+from .estimator import (
+    COMPILED_GAME_DATA,
+    COMPILED_HINT_DATA,
+    MODE_KEYS,
+    SETTINGS,
+    hint_log_likelihoods,
+    mode_log_likelihoods,
+    poisson_log_likelihoods,
+    posterior_probabilities,
+)
+
+DEFAULT_CHUNK_SIZE = 65536 # 1回のベクトル演算で処理する台数
+
+
+def _table_length(table):
+    """テーブル（構造化配列または配列のdict）の行数を返す。"""
+    if isinstance(table, np.ndarray):
+        return len(table)
+    for value in table.values():
+        if isinstance(value, dict):
+            for nested_value in value.values():
+                return len(nested_value)
+        else:
+            return len(value)
+    return 0
+
+
+def _column(table, key, start, stop):
+    """列を取り出す。存在しない列は0埋めとする。"""
+    if isinstance(table, np.ndarray):
+        if key in (table.dtype.names or ()):
+            return np.asarray(table[key][start:stop], dtype=float)
+    elif key in table and not isinstance(table[key], dict):
+        return np.asarray(table[key][start:stop], dtype=float)
+    return np.zeros(stop - start)
+
+
+def _nested_column(table, group, key, start, stop):
+    """
+    モード・示唆の列を取り出す。
+    dict形式なら table[group][key]（user_inputs_for_predictionと同じ入れ子）、
+    構造化配列なら key（例: "モードA"）という名前のフィールドを参照する。
+    """
+    if not isinstance(table, np.ndarray) and isinstance(table.get(group), dict):
+        if key in table[group]:
+            return np.asarray(table[group][key][start:stop], dtype=float)
+        return np.zeros(stop - start)
+    return _column(table, key, start, stop)
+
+
+def batch_log_likelihoods(table, start, stop, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA, likelihood_table=None):
+    """
+    テーブルの[start, stop)行について(台数×設定)の総合対数尤度を返す。
+    likelihood_table: vvv.cache.LikelihoodTableを渡すと、ポアソン尤度を事前計算テーブルから引く。
+    """
+    observed = np.stack([_column(table, key, start, stop) for key in compiled["observed_keys"]], axis=-1)
+    trials = np.stack([_column(table, key, start, stop) for key in compiled["trial_keys"]], axis=-1)
+    if likelihood_table is not None:
+        log_likelihoods = likelihood_table.poisson_log_likelihoods(observed, trials).sum(axis=-2)
+    else:
+        log_likelihoods = poisson_log_likelihoods(observed, trials, compiled).sum(axis=-2)
+
+    mode_counts = np.stack([_nested_column(table, 'mode_observed_counts', mode_char, start, stop) for mode_char in MODE_KEYS], axis=-1)
+    log_likelihoods += mode_log_likelihoods(mode_counts, _column(table, 'mode_total_count', start, stop), compiled)
+
+    hint_counts = np.stack([_nested_column(table, 'hints_observed_counts', hint_key, start, stop) for hint_key in compiled_hints["keys"]], axis=-1)
+    log_likelihoods += hint_log_likelihoods(hint_counts, compiled_hints)
+    return log_likelihoods
+
+
+def predict_setting_batch(table, chunk_size=DEFAULT_CHUNK_SIZE, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA,
+                          likelihood_table=None, row_count=None):
+    """
+    複数台の設定をまとめて推測する。
+    table: 1行1台のNumPy構造化配列、または列名→配列のdict。
+           列名はuser_inputs_for_predictionと同じ（モード・示唆は入れ子のdict、
+           構造化配列の場合は"モードA"や示唆名をそのままフィールド名にする）。
+    戻り値: (posteriors, predicted_settings)
+        posteriors: (台数×6) の各設定の確率（合計1）。推測できない行はNaN。
+        predicted_settings: 最も確率が高い設定（1〜6）。推測できない行は0。
+    row_count: 行数。省略時は最初の列の長さ（列が1つもないテーブルでは0行になるため、その場合は指定する）
+    """
+    if row_count is None:
+        row_count = _table_length(table)
+    posteriors = np.full((row_count, len(SETTINGS)), np.nan)
+    predicted_settings = np.zeros(row_count, dtype=np.int64)
+
+    for start in range(0, row_count, chunk_size):
+        stop = min(start + chunk_size, row_count)
+        log_likelihoods = batch_log_likelihoods(table, start, stop, compiled, compiled_hints, likelihood_table)
+
+        # predict_settingと同じく、総ゲーム数もCZ総回数もない行は推測しない
+        has_data = (_column(table, 'total_game_count', start, stop) != 0) | (_column(table, 'cz_total_count', start, stop) != 0)
+        valid = has_data & np.any(np.isfinite(log_likelihoods), axis=-1)
+        if not np.any(valid):
+            continue
+
+        chunk_posteriors = posterior_probabilities(log_likelihoods[valid])
+        rows = np.arange(start, stop)[valid]
+        posteriors[rows] = chunk_posteriors
+        predicted_settings[rows] = np.argmax(chunk_posteriors, axis=-1) + SETTINGS[0]
+
+    return posteriors, predicted_settings
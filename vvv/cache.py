@@ -0,0 +1,246 @@
+"""
+推測エンジンのキャッシュ層。
+
+- LikelihoodCache: 正規化した観測値のタプルをキーにした件数上限付きLRUキャッシュ
+- LikelihoodTable: (試行回数, 観測回数) の格子で各指標の対数尤度を事前計算し、
+  ディスクからメモリマップで読み込む表。範囲外の入力はscipyで計算する。
+
+    python -m vvv.cache build <出力ディレクトリ>
+"""
+import argparse
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .estimator import (
+    COMPILED_GAME_DATA,
+    COMPILED_HINT_DATA,
+    MODE_KEYS,
+    POISSON_METRICS,
+    hint_log_likelihoods,
+    mode_log_likelihoods,
+    poisson_log_likelihoods,
+)
+
+DEFAULT_CACHE_SIZE = 4096
+
+# 事前計算する格子の大きさ（1/X形式はゲーム数が試行回数になるため大きく取る）
+DEFAULT_TABLE_GRID = {
+    "denominator": {"max_trials": 10000, "max_hits": 63},
+    "probability": {"max_trials": 255, "max_hits": 255},
+}
+
+TABLE_MANIFEST = "manifest.json"
+
+
+def _normalize(value):
+    return float(value or 0)
+
+
+def observation_key(data_inputs, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA):
+    """
+    入力データを対数尤度の計算に必要な値だけのタプルに正規化する。
+    欠けている項目は0、数値はfloatに揃えるため、同じ観測値なら同じキーになる。
+    """
+    mode_observed_counts = data_inputs.get('mode_observed_counts', {})
+    hints_observed_counts = data_inputs.get('hints_observed_counts', {})
+    return (
+        tuple(_normalize(data_inputs.get(key, 0)) for key in compiled["observed_keys"]),
+        tuple(_normalize(data_inputs.get(key, 0)) for key in compiled["trial_keys"]),
+        _normalize(data_inputs.get('mode_total_count', 0)),
+        tuple(_normalize(mode_observed_counts.get(mode_char, 0)) for mode_char in MODE_KEYS),
+        tuple(_normalize(hints_observed_counts.get(hint_key, 0)) for hint_key in compiled_hints["keys"]),
+    )
+
+
+# --- 事前計算テーブル ---
+TABLE_FORMAT_VERSION = 2
+TABLE_VALUES = "values.npy"
+
+
+def build_likelihood_table(directory, grid=DEFAULT_TABLE_GRID, compiled=COMPILED_GAME_DATA):
+    """
+    全指標の (試行回数+1, 観測回数+1, 設定) の対数尤度を1つの (格子点数×設定) 配列に並べて保存する。
+    指標ごとの先頭位置・格子の大きさはmanifest.jsonに書く。
+    """
+    os.makedirs(directory, exist_ok=True)
+    blocks = []
+    offsets = []
+    shapes = []
+    offset = 0
+    for row, metric in enumerate(POISSON_METRICS):
+        metric_grid = grid["denominator" if metric[3] else "probability"]
+        trials, observed = np.meshgrid(
+            np.arange(metric_grid["max_trials"] + 1), np.arange(metric_grid["max_hits"] + 1), indexing="ij"
+        )
+        sub_compiled = {"per_trial": compiled["per_trial"][row:row + 1], "requires_hit": compiled["requires_hit"][row:row + 1]}
+        log_likelihoods = poisson_log_likelihoods(observed[..., None], trials[..., None], sub_compiled)[..., 0, :]
+        blocks.append(log_likelihoods.reshape(-1, log_likelihoods.shape[-1]))
+        offsets.append(offset)
+        shapes.append(list(log_likelihoods.shape[:2]))
+        offset += len(blocks[-1])
+    np.save(os.path.join(directory, TABLE_VALUES), np.concatenate(blocks))
+
+    with open(os.path.join(directory, TABLE_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({
+            "format_version": TABLE_FORMAT_VERSION,
+            "metric_keys": [metric[0] for metric in POISSON_METRICS],
+            "per_trial": compiled["per_trial"].tolist(),
+            "offsets": offsets,
+            "shapes": shapes,
+        }, f, ensure_ascii=False)
+
+
+class LikelihoodTable:
+    """build_likelihood_tableで作った表をメモリマップで読み込み、配列参照で対数尤度を返す。"""
+
+    def __init__(self, directory, compiled=COMPILED_GAME_DATA):
+        with open(os.path.join(directory, TABLE_MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != TABLE_FORMAT_VERSION:
+            raise ValueError(f"事前計算テーブルの形式が古いため読み込めません。作り直してください: {directory}")
+        if manifest["metric_keys"] != [metric[0] for metric in POISSON_METRICS] or \
+           not np.array_equal(np.array(manifest["per_trial"]), compiled["per_trial"]):
+            raise ValueError(f"事前計算テーブルが現在のGAME_DATAと一致しません。作り直してください: {directory}")
+
+        self.compiled = compiled
+        self.values = np.load(os.path.join(directory, TABLE_VALUES), mmap_mode="r")
+        self.offsets = np.array(manifest["offsets"], dtype=np.int64)
+        shapes = np.array(manifest["shapes"], dtype=np.int64)
+        self.trial_limits = shapes[:, 0]
+        self.hit_limits = shapes[:, 1]
+        self._offsets, self._trial_limits, self._hit_limits = self.offsets.tolist(), self.trial_limits.tolist(), self.hit_limits.tolist()
+        self.hits = 0
+        self.misses = 0
+
+    def poisson_log_likelihoods(self, observed, trials):
+        """
+        poisson_log_likelihoodsと同じ値を返す。observed, trials: 末尾の軸が指標の配列。戻り値: (..., 指標, 設定)
+        格子に収まる要素は1回の配列参照でまとめて引き、範囲外・非整数の要素だけを計算する。
+        """
+        if np.ndim(observed) == 1:
+            return self._single_poisson_log_likelihoods(observed, trials)
+
+        observed = np.asarray(observed, dtype=float)
+        trials = np.asarray(trials, dtype=float)
+        with np.errstate(invalid="ignore"):
+            in_range = (trials >= 0) & (trials < self.trial_limits) & (observed >= 0) & (observed < self.hit_limits) & \
+                       (trials == np.floor(trials)) & (observed == np.floor(observed))
+        positions = self.offsets + np.where(in_range, trials, 0).astype(np.int64) * self.hit_limits + np.where(in_range, observed, 0).astype(np.int64)
+        result = self.values[np.where(in_range, positions, 0)]
+
+        missing_count = int(in_range.size - np.count_nonzero(in_range))
+        self.hits += in_range.size - missing_count
+        self.misses += missing_count
+        if missing_count:
+            missing = ~in_range
+            metric_rows = np.broadcast_to(np.arange(len(self.offsets)), in_range.shape)[missing]
+            sub_compiled = {"per_trial": self.compiled["per_trial"][metric_rows], "requires_hit": self.compiled["requires_hit"][metric_rows]}
+            result[missing] = poisson_log_likelihoods(observed[missing], trials[missing], sub_compiled)
+        return result
+
+    def _single_poisson_log_likelihoods(self, observed, trials):
+        """1件分。要素数が少ないと配列演算の呼び出しの方が重いため、位置の計算はPythonで行う。"""
+        positions = []
+        missing_rows = []
+        for row, (observed_count, trial_count) in enumerate(zip(observed, trials)):
+            if 0 <= trial_count < self._trial_limits[row] and 0 <= observed_count < self._hit_limits[row] and \
+               trial_count == int(trial_count) and observed_count == int(observed_count):
+                positions.append(self._offsets[row] + int(trial_count) * self._hit_limits[row] + int(observed_count))
+            else:
+                positions.append(0)
+                missing_rows.append(row)
+        result = self.values[positions]
+
+        self.hits += len(positions) - len(missing_rows)
+        self.misses += len(missing_rows)
+        if missing_rows:
+            sub_compiled = {"per_trial": self.compiled["per_trial"][missing_rows], "requires_hit": self.compiled["requires_hit"][missing_rows]}
+            result[missing_rows] = poisson_log_likelihoods(np.take(observed, missing_rows), np.take(trials, missing_rows), sub_compiled)
+        return result
+
+
+_opened_tables = {}
+
+
+def open_likelihood_table(directory, compiled=COMPILED_GAME_DATA):
+    """事前計算テーブルを開く。同じディレクトリはプロセス内で1回だけ読み込む。"""
+    key = (os.path.abspath(directory), id(compiled))
+    if key not in _opened_tables:
+        _opened_tables[key] = LikelihoodTable(directory, compiled)
+    return _opened_tables[key]
+
+
+# --- LRUキャッシュ ---
+class LikelihoodCache:
+    """
+    setting_log_likelihoodsの結果をobservation_keyでキャッシュする。
+    tableを渡すと、キャッシュミス時のポアソン尤度を事前計算テーブルから引く。
+    compiled / compiled_hints: 機種の変換済みGAME_DATA / HINT_DATA（machine_tablesの戻り値）
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, table=None, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA):
+        self.maxsize = maxsize
+        self.table = table
+        self.compiled = compiled
+        self.compiled_hints = compiled_hints
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def setting_log_likelihoods(self, data_inputs):
+        key = observation_key(data_inputs, self.compiled, self.compiled_hints)
+        log_likelihoods = self._entries.get(key)
+        if log_likelihoods is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return log_likelihoods
+
+        self.misses += 1
+        log_likelihoods = self._compute(key)
+        log_likelihoods.flags.writeable = False # キャッシュ内の値を書き換えられないようにする
+        self._entries[key] = log_likelihoods
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return log_likelihoods
+
+    def _compute(self, key):
+        observed, trials, mode_total_count, mode_counts, hint_counts = key
+        if self.table is not None:
+            poisson_part = self.table.poisson_log_likelihoods(observed, trials)
+        else:
+            poisson_part = poisson_log_likelihoods(observed, trials, self.compiled)
+        log_likelihoods = poisson_part.sum(axis=0)
+        log_likelihoods += mode_log_likelihoods(mode_counts, mode_total_count, self.compiled)
+        log_likelihoods += hint_log_likelihoods(hint_counts, self.compiled_hints)
+        return log_likelihoods
+
+    def stats(self):
+        """キャッシュサイズ調整用のヒット・ミス件数。"""
+        stats = {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+        if self.table is not None:
+            stats["table_hits"] = self.table.hits
+            stats["table_misses"] = self.table.misses
+        return stats
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="対数尤度の事前計算テーブルを作成します。")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="テーブルを作成する")
+    build_parser.add_argument("directory", help="出力ディレクトリ")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_likelihood_table(args.directory)
+
+
+if __name__ == "__main__":
+    main()
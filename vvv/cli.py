@@ -0,0 +1,242 @@
+"""
+vvv-estimate: 観測データ（JSON / CSV）を読み込み、各設定の推測確率をJSON Linesで出力する。
+
+    vvv-estimate observations.csv > posteriors.jsonl
+    cat observations.jsonl | vvv-estimate
+
+JSONは1行1件（JSON Lines）、またはオブジェクトの配列。各オブジェクトは
+user_inputs_for_predictionと同じ形式（モード・示唆は入れ子のdict）。
+CSVは1行1台で、モード・示唆の列は"モードA"や示唆名をそのまま列名にする。
+"id"列があれば出力にそのまま含める。
+数値でない値などで推測できない行は {"id", "error"} を出力して残りの行の推測を続け、
+最後に入力の位置を添えたエラーを1行表示して終了コード1で終わる。
+--machineでスペック表（vvv/specs/）の機種を選べる。
+--likelihood-tableに `python -m vvv.cache build <dir>` で作った事前計算テーブルを渡すと、ポアソン尤度を表から引く。
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import sys
+
+ID_FIELD = "id"
+ERROR_FIELD = "error"
+NESTED_FIELDS = ('mode_observed_counts', 'hints_observed_counts')
+
+
+def _parse_number(value):
+    value = value.strip()
+    if not value:
+        return 0
+    try:
+        number = float(value)
+    except ValueError:
+        return value # 数値でない値は_record_errorでその行のエラーにする
+    return int(number) if number.is_integer() else number
+
+
+def _numbered_json_records(text):
+    """
+    (行番号, レコード) のリストを返す。JSON配列の要素は行番号をNoneにする。
+    JSON Linesで読めない行のレコードはNone（_record_errorでその行のエラーにする）。
+    """
+    stripped = text.lstrip()
+    first_line = text[:len(text) - len(stripped)].count("\n") + 1
+    if stripped.startswith("["):
+        return [(None, record) for record in json.loads(stripped)]
+    try:
+        return [(first_line, json.loads(stripped))] if stripped else []
+    except json.JSONDecodeError:
+        pass
+    records = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            records.append((line_number, json.loads(line)))
+        except json.JSONDecodeError:
+            records.append((line_number, None))
+    return records
+
+
+def read_json_records(text):
+    """JSON配列、単一オブジェクト、JSON Linesのいずれかを読み込む。"""
+    return [record for _, record in _numbered_json_records(text)]
+
+
+def _numbered_csv_records(text, machine=None):
+    """(行番号, レコード) のリストを返す。列数がヘッダーと合わない行のレコードはNone。"""
+    from .estimator import MODE_KEYS, machine_tables
+
+    hint_keys = machine_tables(machine)[1]["keys"]
+
+    records = []
+    reader = csv.DictReader(io.StringIO(text))
+    for row in reader:
+        record = {'mode_observed_counts': {}, 'hints_observed_counts': {}}
+        for key, value in row.items():
+            if key is None or value is None: # 列が多すぎる・足りない
+                record = None
+                break
+            if key == ID_FIELD:
+                record[ID_FIELD] = value
+            elif key in MODE_KEYS:
+                record['mode_observed_counts'][key] = _parse_number(value)
+            elif key in hint_keys:
+                record['hints_observed_counts'][key] = _parse_number(value)
+            else:
+                record[key] = _parse_number(value)
+        records.append((reader.line_num, record))
+    return records
+
+
+def read_csv_records(text, machine=None):
+    """CSVを読み込み、モード・示唆の列を入れ子のdictにまとめる。"""
+    return [record for _, record in _numbered_csv_records(text, machine)]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _record_error(record):
+    """推測に使えないレコードならその理由、使えるならNoneを返す。"""
+    if not isinstance(record, dict):
+        return "レコードとして読み込めません"
+    for key, value in record.items():
+        if key == ID_FIELD:
+            continue
+        if key in NESTED_FIELDS:
+            if not isinstance(value, dict):
+                return f"{key}はオブジェクトにしてください"
+            for nested_key, nested_value in value.items():
+                if not _is_number(nested_value):
+                    return f"{key}の{nested_key}が数値ではありません: {nested_value!r}"
+        elif not _is_number(value):
+            return f"{key}が数値ではありません: {value!r}"
+    return None
+
+
+def records_to_table(records):
+    """レコードのリストをpredict_setting_batch用の列名→配列のdictに変換する。"""
+    import numpy as np
+
+    flat_keys = {key for record in records for key in record if key not in NESTED_FIELDS and key != ID_FIELD}
+    table = {key: np.array([record.get(key, 0) for record in records], dtype=float) for key in flat_keys}
+    for nested_field in NESTED_FIELDS:
+        nested_keys = {key for record in records for key in record.get(nested_field, {})}
+        table[nested_field] = {
+            key: np.array([record.get(nested_field, {}).get(key, 0) for record in records], dtype=float)
+            for key in nested_keys
+        }
+    return table
+
+
+def estimate_records(records, machine=None, likelihood_table=None):
+    """
+    レコードごとに {"id", "predicted_setting", "posterior"} のdictを返す。推測できない行はnull。
+    数値でない値などを含むレコードは {"id", "error"} を返し、他のレコードの推測は続ける。
+    machine: スペック表の機種名（省略時はヴァルヴレイヴ）
+    likelihood_table: 事前計算テーブルのディレクトリ（プロセスごとに1回だけ開く）
+    """
+    from .batch import predict_setting_batch
+    from .estimator import machine_tables
+
+    errors = [_record_error(record) for record in records]
+    valid_records = [record for record, error in zip(records, errors) if error is None]
+    scored = iter(())
+    if valid_records:
+        compiled, compiled_hints = machine_tables(machine)
+        if likelihood_table is not None:
+            from .cache import open_likelihood_table
+
+            likelihood_table = open_likelihood_table(likelihood_table, compiled)
+        posteriors, predicted_settings = predict_setting_batch(
+            records_to_table(valid_records), compiled=compiled, compiled_hints=compiled_hints, likelihood_table=likelihood_table,
+            row_count=len(valid_records), # {"id": 1}だけのレコードでは列が1つもできない
+        )
+        scored = zip(posteriors, predicted_settings)
+
+    results = []
+    for record, error in zip(records, errors):
+        if error is not None:
+            result = {ERROR_FIELD: error}
+        else:
+            posterior, predicted_setting = next(scored)
+            result = {"predicted_setting": int(predicted_setting) or None, "posterior": None if predicted_setting == 0 else posterior.tolist()}
+        if isinstance(record, dict) and ID_FIELD in record:
+            result = {ID_FIELD: record[ID_FIELD], **result}
+        results.append(result)
+    return results
+
+
+def _detect_format(name, text):
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".json", ".jsonl")):
+        return "json"
+    return "json" if text.lstrip()[:1] in ("{", "[") else "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vvv-estimate", description="観測データから各設定の推測確率をJSON Linesで出力します。")
+    parser.add_argument("files", nargs="*", help="入力ファイル（省略時は標準入力）")
+    parser.add_argument("--format", choices=("auto", "json", "csv"), default="auto", help="入力形式（既定は自動判別）")
+    parser.add_argument("-o", "--output", help="出力ファイル（省略時は標準出力）")
+    parser.add_argument("--machine", help="スペック表の機種名（省略時はヴァルヴレイヴ）")
+    parser.add_argument("--likelihood-table", help="事前計算テーブルのディレクトリ（python -m vvv.cache buildで作成）")
+    args = parser.parse_args(argv)
+
+    # 機種名やテーブルの誤りは入力を読む前に1行のメッセージで終了する
+    from .estimator import machine_tables
+
+    try:
+        compiled = machine_tables(args.machine)[0]
+        if args.likelihood_table is not None:
+            from .cache import open_likelihood_table
+
+            open_likelihood_table(args.likelihood_table, compiled)
+    except ValueError as error:
+        sys.exit(f"vvv-estimate: {error}")
+    except (OSError, KeyError) as error:
+        sys.exit(f"vvv-estimate: 事前計算テーブルを読み込めません: {error}")
+
+    records = []
+    locations = [] # エラー表示用の入力位置（レコードと同じ順）
+    for name in args.files or ["-"]:
+        label = "<stdin>" if name == "-" else name
+        try:
+            if name == "-":
+                text = sys.stdin.read()
+            else:
+                with open(name, encoding="utf-8") as f:
+                    text = f.read()
+        except (OSError, UnicodeDecodeError) as error:
+            sys.exit(f"vvv-estimate: {label}: 読み込めません: {error}")
+        input_format = _detect_format(name, text) if args.format == "auto" else args.format
+        try:
+            numbered_records = _numbered_csv_records(text, args.machine) if input_format == "csv" else _numbered_json_records(text)
+        except (json.JSONDecodeError, csv.Error) as error:
+            sys.exit(f"vvv-estimate: {label}: 読み込めません: {error}")
+        for i, (line_number, record) in enumerate(numbered_records):
+            records.append(record)
+            locations.append(f"{label}:{line_number}" if line_number is not None else f"{label}の{i + 1}件目")
+
+    error_locations = []
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for location, result in zip(locations, estimate_records(records, args.machine, args.likelihood_table)):
+            if ERROR_FIELD in result:
+                error_locations.append(f"{location}: {result[ERROR_FIELD]}")
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    if error_locations:
+        others = f" ほか{len(error_locations) - 1}件" if len(error_locations) > 1 else ""
+        sys.exit(f"vvv-estimate: 推測できない入力があります（{error_locations[0]}{others}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# --- 定義データ ---
+# 各設定ごとのスペック・確率情報は機種ごとのスペック表（vvv/specs/valvrave.json）にある
+# 数値は全て1/X.Xの場合のX.X、または%の場合の小数（例: 0.27%は0.0027）
+# GAME_DATA: {項目名: {設定: 値}} / HINT_DATA: {示唆名: 示唆の種類と倍率}
+from .registry import DEFAULT_MACHINE, load_spec
+
+GAME_DATA = load_spec(DEFAULT_MACHINE)["game_data"]
+HINT_DATA = load_spec(DEFAULT_MACHINE)["hint_data"]
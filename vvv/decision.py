@@ -0,0 +1,158 @@
+"""
+やめ時判断: 「設定4以上」と「設定2以下」の逐次確率比検定（SPRT）と、期待差枚の予測。
+
+閾値や1Gあたりの情報量は QuitDecision の生成時に一度だけ計算し、
+evaluate() は各設定の対数尤度（6要素）から数十マイクロ秒で判断を返す。
+"""
+import math
+
+from .estimator import (
+    COMPILED_GAME_DATA,
+    METRIC_BONUS,
+    METRIC_HARIKIRI_DRIVE,
+    METRIC_YURIKUUKAN_CUT_HD,
+    POISSON_METRICS,
+    SETTINGS,
+    SSR_METRIC_ROWS,
+)
+
+ACTION_KEEP = "keep" # 続行（高設定と判断）
+ACTION_QUIT = "quit" # やめ（低設定と判断）
+ACTION_NEED_MORE_GAMES = "need_more_games" # まだ判断できない
+
+HIGH_SETTINGS = (4, 5, 6)
+LOW_SETTINGS = (1, 2)
+COINS_PER_GAME = 3 # 1Gあたりの投入枚数
+DEFAULT_PROJECTION_GAMES = 1000 # 期待差枚を予測するゲーム数
+MAX_GAMES_NEEDED = 10000 # 1日に回せるゲーム数の目安。これを超える見込みは意味がないためNoneを返す
+
+# 解析値がない部分の仮定（1回の初当りあたりの平均試行回数。vvv.simulatorもこの値で模擬データを作る）
+DEFAULT_PER_BONUS_PARAMS = {
+    "harikiri_drive_lotteries_per_bonus": 1.0, # ハラキリドライブ抽選回数
+    "ssr_sets_per_bonus": 1.5, # 超革命ラッシュのセット数
+    "yurikuukan_cuts_per_bonus": 0.2, # 有利区間切断回数
+}
+
+# 初当り1回あたりの試行回数に比例する指標 → 1回の初当りあたりの試行回数を表すパラメーター
+PER_BONUS_METRIC_PARAMS = {
+    METRIC_HARIKIRI_DRIVE: "harikiri_drive_lotteries_per_bonus",
+    **{row: "ssr_sets_per_bonus" for row in SSR_METRIC_ROWS},
+    METRIC_YURIKUUKAN_CUT_HD: "yurikuukan_cuts_per_bonus",
+}
+
+
+def _log_sum_exp(values):
+    max_value = max(values)
+    if max_value == -math.inf:
+        return -math.inf
+    return max_value + math.log(sum(math.exp(value - max_value) for value in values))
+
+
+def _poisson_kl(rate_p, rate_q):
+    """1試行あたりの発生率rate_pとrate_qのポアソン過程のKLダイバージェンス。"""
+    return rate_p * math.log(rate_p / rate_q) - (rate_p - rate_q)
+
+
+def _group_mean(values, indices):
+    return sum(values[i] for i in indices) / len(indices)
+
+
+class QuitDecision:
+    """
+    alpha: 設定2以下なのに「続行」と判断する確率の上限
+    beta: 設定4以上なのに「やめ」と判断する確率の上限
+    prior: 各設定の事前確率（省略時は一様）
+    params: 初当りあたりの試行回数の仮定（必要ゲーム数の見込みに使う。DEFAULT_PER_BONUS_PARAMSと同じキーを持つdict）
+    """
+
+    def __init__(self, alpha=0.05, beta=0.05, prior=None, projection_games=DEFAULT_PROJECTION_GAMES,
+                 compiled=COMPILED_GAME_DATA, params=DEFAULT_PER_BONUS_PARAMS):
+        prior = prior or {setting: 1.0 / len(SETTINGS) for setting in SETTINGS}
+        self.log_prior = [math.log(prior[setting]) for setting in SETTINGS]
+        self.projection_games = projection_games
+
+        # Waldの閾値
+        self.keep_threshold = math.log((1.0 - beta) / alpha)
+        self.quit_threshold = math.log(beta / (1.0 - alpha))
+
+        self._high_indices = [setting - SETTINGS[0] for setting in HIGH_SETTINGS]
+        self._low_indices = [setting - SETTINGS[0] for setting in LOW_SETTINGS]
+        # 尤度比は各仮説の中で正規化した事前確率で重み付けする（設定数の違いで判断が偏らないように）
+        self._log_prior_high = _log_sum_exp([self.log_prior[i] for i in self._high_indices])
+        self._log_prior_low = _log_sum_exp([self.log_prior[i] for i in self._low_indices])
+
+        # 1Gあたりの期待差枚
+        self.coin_difference_per_game = [COINS_PER_GAME * (payout_rate - 1.0) for payout_rate in compiled["payout_rates"].tolist()]
+
+        # 1Gあたりに対数尤度比が動く量の期待値（実際の設定が高設定群・低設定群のそれぞれの場合）
+        # ゲーム数を試行回数とする指標（1/X形式）はKLダイバージェンスそのもの、
+        # 初当りごとに試行がある指標（ハラキリドライブ・セット振り分け・有利区間切断）は
+        # 初当り確率×初当りあたりの試行回数を掛ける。
+        # 示唆はHINT_DATAに出現率がなく、モード比率は尤度がポアソン型でないため含めない（見込みは保守的になる）
+        per_trial = compiled["per_trial"]
+        high_rates = [_group_mean(per_trial[row], self._high_indices) for row in range(len(POISSON_METRICS))]
+        low_rates = [_group_mean(per_trial[row], self._low_indices) for row in range(len(POISSON_METRICS))]
+
+        high_information = 0.0
+        low_information = 0.0
+        high_information_per_bonus = 0.0
+        low_information_per_bonus = 0.0
+        for row, metric in enumerate(POISSON_METRICS):
+            if metric[3]:
+                high_information += _poisson_kl(high_rates[row], low_rates[row])
+                low_information += _poisson_kl(low_rates[row], high_rates[row])
+            elif row in PER_BONUS_METRIC_PARAMS:
+                trials_per_bonus = params[PER_BONUS_METRIC_PARAMS[row]]
+                high_information_per_bonus += trials_per_bonus * _poisson_kl(high_rates[row], low_rates[row])
+                low_information_per_bonus += trials_per_bonus * _poisson_kl(low_rates[row], high_rates[row])
+
+        self.high_information_per_game = high_information + high_rates[METRIC_BONUS] * high_information_per_bonus
+        self.low_information_per_game = low_information + low_rates[METRIC_BONUS] * low_information_per_bonus
+
+    def evaluate(self, log_likelihoods):
+        """
+        各設定の対数尤度から判断を返す。
+        action: "keep" / "quit" / "need_more_games"
+        games_needed: 判断が出るまでに必要な見込みゲーム数（判断済みなら0、MAX_GAMES_NEEDEDを超える見込みならNone）
+        expected_coin_difference: 今後projection_gamesゲームの期待差枚
+        """
+        log_posterior = [log_likelihood + log_prior for log_likelihood, log_prior in zip(log_likelihoods, self.log_prior)]
+        log_high = _log_sum_exp([log_posterior[i] for i in self._high_indices]) - self._log_prior_high
+        log_low = _log_sum_exp([log_posterior[i] for i in self._low_indices]) - self._log_prior_low
+        log_likelihood_ratio = log_high - log_low
+
+        log_normalizer = _log_sum_exp(log_posterior)
+        posterior = [math.exp(value - log_normalizer) for value in log_posterior]
+        expected_coin_difference = self.projection_games * sum(p * c for p, c in zip(posterior, self.coin_difference_per_game))
+
+        games_needed = 0
+        if log_likelihood_ratio >= self.keep_threshold:
+            action = ACTION_KEEP
+        elif log_likelihood_ratio <= self.quit_threshold:
+            action = ACTION_QUIT
+        else:
+            action = ACTION_NEED_MORE_GAMES
+            # 高設定・低設定の相対的な確からしさで重み付けした、1Gあたりの対数尤度比の期待変化量
+            probability_high = 1.0 / (1.0 + math.exp(-log_likelihood_ratio))
+            drift = probability_high * self.high_information_per_game - (1.0 - probability_high) * self.low_information_per_game
+            if drift > 0:
+                games_needed = math.ceil((self.keep_threshold - log_likelihood_ratio) / drift)
+            elif drift < 0:
+                games_needed = math.ceil((log_likelihood_ratio - self.quit_threshold) / -drift)
+            else:
+                games_needed = math.ceil((self.keep_threshold - self.quit_threshold) / max(self.high_information_per_game, self.low_information_per_game))
+            if games_needed > MAX_GAMES_NEEDED:
+                games_needed = None
+
+        return {
+            "action": action,
+            "games_needed": games_needed,
+            "log_likelihood_ratio": log_likelihood_ratio,
+            "probability_high": sum(posterior[i] for i in self._high_indices),
+            "probability_low": sum(posterior[i] for i in self._low_indices),
+            "expected_coin_difference": expected_coin_difference,
+        }
+
+    def evaluate_session(self, session):
+        """SessionPosteriorの現在の状態から判断を返す。"""
+        return self.evaluate(session.log_likelihoods.tolist())
@@ -0,0 +1,446 @@
+import time
+
+import numpy as np
+
+from .data import GAME_DATA, HINT_DATA
+from .registry import DEFAULT_MACHINE, compiled_spec
+
+# --- 定数 ---
+SETTINGS = (1, 2, 3, 4, 5, 6)
+
+LIKELIHOOD_FLOOR = 1e-10 # 1要素あたりの尤度の下限
+LOG_LIKELIHOOD_FLOOR = np.log(LIKELIHOOD_FLOOR)
+MODE_LIKELIHOOD_FLOOR = 1e-5 # モード比率の適合度の下限
+MODE_LIKELIHOOD_EXPONENT = 0.25 # 0.25乗で影響を弱める
+LOG_MODE_LIKELIHOOD_FLOOR = MODE_LIKELIHOOD_EXPONENT * np.log(MODE_LIKELIHOOD_FLOOR)
+
+# ポアソン尤度で評価する指標
+# (GAME_DATAのキー, 観測回数の入力キー, 試行回数の入力キー, 1/X形式か, 観測0回なら評価しないか)
+POISSON_METRICS = (
+    ("ボーナス初当り確率", "at_first_hit_count", "total_game_count", True, False),
+    ("CZ_共闘Vチャレンジ_出現率", "cz_kyoutou_v_challenge_count", "cz_kyoutou_v_challenge_total_count", True, False),
+    ("ハラキリドライブ発生率", "harikiri_drive_count", "harikiri_drive_total_count", False, False),
+    ("超革命ラッシュ_セットゲーム_10G", "ssr_10g_count", "total_ssr_sets", False, True),
+    ("超革命ラッシュ_セットゲーム_20G", "ssr_20g_count", "total_ssr_sets", False, True),
+    ("超革命ラッシュ_セットゲーム_50G", "ssr_50g_count", "total_ssr_sets", False, True),
+    ("超革命ラッシュ_セットゲーム_100G", "ssr_100g_count", "total_ssr_sets", False, True),
+    ("有利区間切断時ハラキリドライブ発生率", "yurikuukan_cut_hd_count", "yurikuukan_cut_total_count", False, False),
+)
+
+# POISSON_METRICSの行番号（変換済みの行列を文字列キーを使わずに参照するため）
+(
+    METRIC_BONUS,
+    METRIC_CZ_KYOUTOU_V_CHALLENGE,
+    METRIC_HARIKIRI_DRIVE,
+    METRIC_SSR_10G,
+    METRIC_SSR_20G,
+    METRIC_SSR_50G,
+    METRIC_SSR_100G,
+    METRIC_YURIKUUKAN_CUT_HD,
+) = range(len(POISSON_METRICS))
+SSR_METRIC_ROWS = (METRIC_SSR_10G, METRIC_SSR_20G, METRIC_SSR_50G, METRIC_SSR_100G)
+
+# 計測（instrumented_log_likelihoods）で内訳を出す単位。ブロック名 → POISSON_METRICSの行番号
+METRIC_BLOCKS = (
+    ("bonus", (METRIC_BONUS,)),
+    ("cz_kyoutou_v_challenge", (METRIC_CZ_KYOUTOU_V_CHALLENGE,)),
+    ("harikiri_drive", (METRIC_HARIKIRI_DRIVE,)),
+    ("ssr_sets", SSR_METRIC_ROWS),
+    ("yurikuukan_cut", (METRIC_YURIKUUKAN_CUT_HD,)),
+)
+
+MODE_KEYS = ("モードA", "モードB", "モードC", "モードD")
+MODE_RATE_KEYS = ("通常時モード比率_モードA", "通常時モード比率_モードB", "通常時モード比率_モードC", "通常時モード比率_モードD")
+PAYOUT_RATE_KEY = "機械割"
+
+COMPILE_VERSION = 1 # compile_game_data / compile_hint_dataの戻り値の形式を変えたら上げる（ディスクキャッシュの無効化）
+
+
+# --- 推測ロジック関数 ---
+def calculate_likelihood(observed_count, total_count, target_rate_value, is_probability_rate=True):
+    """
+    実測値と解析値から尤度を計算する。
+    target_rate_value: 1/X形式の場合のX、または%形式の小数。
+    is_probability_rate: Trueなら確率（%表示の小数）、Falseなら分母（1/XのX）
+    """
+    from scipy.stats import poisson # scipy.statsは読み込みが重いため使う時だけimportする
+
+    if total_count <= 0: # 試行回数がゼロ以下なら計算に影響を与えない
+        return 1.0
+
+    # 観測回数もゼロなら影響を与えない（データがないのと同じ）
+    if observed_count <= 0 and total_count > 0:
+        # ただし、解析値が0%なのに観測値が0なら尤度が高い
+        if (is_probability_rate and target_rate_value <= 1e-10) or \
+           (not is_probability_rate and target_rate_value == float('inf')): # 分母無限大=確率0
+           return 1.0 # 観測0で解析値も0なら尤度高い
+
+    if is_probability_rate: # %形式の確率の場合
+        expected_value = total_count * target_rate_value
+    else: # 1/X形式の分母の場合
+        if target_rate_value <= 1e-10: # 分母が0はありえないが念のため
+            return 1e-10 # 確率無限大になるので極めて低い尤度
+        expected_value = total_count / target_rate_value
+
+    # 期待値が0の場合
+    if expected_value <= 1e-10: # 非常に小さい値で0とみなす
+        return 1.0 if observed_count == 0 else 1e-10 # 期待値0で観測も0なら尤度1、観測1以上ならほぼ0
+
+    # ポアソン分布のPMF (確率質量関数) を使用して尤度を計算
+    likelihood = poisson.pmf(observed_count, expected_value)
+
+    # 尤度がゼロになることを避けるため、非常に小さい値を下限とする
+    return max(likelihood, 1e-10)
+
+
+def compile_game_data(game_data=GAME_DATA):
+    """
+    GAME_DATAを(指標×設定)の行列に変換する。起動時に一度だけ呼ぶ想定。
+    per_trial: 1試行あたりの発生確率（1/X形式は1/Xに換算済み）
+    mode_rates: (モード×設定)のモード比率
+    payout_rates: 各設定の機械割
+    """
+    missing_keys = [key for key in (*(metric[0] for metric in POISSON_METRICS), *MODE_RATE_KEYS, PAYOUT_RATE_KEY) if key not in game_data]
+    if missing_keys:
+        raise ValueError(f"スペック表に必要な項目がありません: {', '.join(missing_keys)}")
+
+    per_trial = np.empty((len(POISSON_METRICS), len(SETTINGS)))
+    for i, (metric_key, _, _, is_denominator, _) in enumerate(POISSON_METRICS):
+        rates = np.array([game_data[metric_key][setting] for setting in SETTINGS], dtype=float)
+        if is_denominator:
+            # 分母が0以下は確率無限大とみなす（尤度は下限になる）
+            with np.errstate(divide="ignore"):
+                rates = np.where(rates > 1e-10, 1.0 / rates, np.inf)
+        per_trial[i] = rates
+
+    mode_rates = np.array([[game_data[key][setting] for setting in SETTINGS] for key in MODE_RATE_KEYS], dtype=float)
+
+    return {
+        "per_trial": per_trial,
+        "observed_keys": tuple(metric[1] for metric in POISSON_METRICS),
+        "trial_keys": tuple(metric[2] for metric in POISSON_METRICS),
+        "requires_hit": np.array([metric[4] for metric in POISSON_METRICS]),
+        "mode_rates": mode_rates,
+        "payout_rates": np.array([game_data[PAYOUT_RATE_KEY][setting] for setting in SETTINGS], dtype=float),
+    }
+
+
+def _check_settings(spec):
+    if spec["settings"] != SETTINGS:
+        raise ValueError(f"設定{SETTINGS[0]}〜{SETTINGS[-1]}以外の設定を持つスペック表には対応していません: {spec['path']}")
+
+
+def _compile_spec_game_data(spec):
+    _check_settings(spec)
+    return compile_game_data(spec["game_data"])
+
+
+def _compile_spec_hint_data(spec):
+    _check_settings(spec)
+    return compile_hint_data(spec["hint_data"])
+
+
+def machine_tables(machine=None):
+    """
+    機種の (変換済みGAME_DATA, 変換済みHINT_DATA) を返す。machineを省略するとヴァルヴレイヴ。
+    スペック表は初めて使う時に読み込み、変換結果はファイルのハッシュごとにディスクへキャッシュする。
+    """
+    machine = machine or DEFAULT_MACHINE
+    return (
+        compiled_spec(machine, "game_data", _compile_spec_game_data, COMPILE_VERSION),
+        compiled_spec(machine, "hint_data", _compile_spec_hint_data, COMPILE_VERSION),
+    )
+
+
+COMPILED_GAME_DATA = compiled_spec(DEFAULT_MACHINE, "game_data", _compile_spec_game_data, COMPILE_VERSION)
+
+
+def poisson_logpmf(observed, expected):
+    """
+    ポアソン分布の対数確率質量関数（scipy.stats.poisson.logpmfと同じ式）。
+    読み込みの重いscipy.statsを避け、scipy.specialだけを使う。
+    """
+    from scipy.special import gammaln, xlogy
+
+    observed = np.asarray(observed, dtype=float)
+    log_pmf = xlogy(observed, expected) - gammaln(observed + 1) - expected
+    # 負・非整数の観測回数は確率0
+    return np.where((observed >= 0) & (observed == np.floor(observed)), log_pmf, -np.inf)
+
+
+def poisson_log_likelihoods(observed, trials, compiled=COMPILED_GAME_DATA):
+    """
+    全指標・全設定のポアソン対数尤度をまとめて計算する。
+    observed, trials: 末尾の軸が指標（POISSON_METRICSの順）の配列。
+    戻り値: (..., 指標, 設定) の対数尤度。評価対象外の指標は0。
+    """
+    observed = np.asarray(observed, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    observed_per_setting = observed[..., None]
+
+    with np.errstate(invalid="ignore"):
+        expected = trials[..., None] * compiled["per_trial"]
+        log_likelihoods = poisson_logpmf(observed_per_setting, expected)
+
+    # 期待値が0とみなせる場合: 観測0なら尤度1、観測ありなら下限
+    log_likelihoods = np.where(
+        expected <= 1e-10,
+        np.where(observed_per_setting == 0, 0.0, LOG_LIKELIHOOD_FLOOR),
+        log_likelihoods,
+    )
+    # 尤度がゼロになることを避けるため下限を設ける（分母0などの不正値も下限扱い）
+    log_likelihoods = np.where(np.isnan(log_likelihoods), LOG_LIKELIHOOD_FLOOR, np.maximum(log_likelihoods, LOG_LIKELIHOOD_FLOOR))
+
+    active = (trials > 0) & (observed >= 0) & (~compiled["requires_hit"] | (observed > 0))
+    return np.where(active[..., None], log_likelihoods, 0.0)
+
+
+def _mode_factor_log_likelihoods(mode_counts, mode_total_count, compiled):
+    """モードごとの適合度の対数。戻り値: (..., モード, 設定)。評価対象外のモードは0。"""
+    mode_counts = np.asarray(mode_counts, dtype=float)
+    mode_total_count = np.asarray(mode_total_count, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed_ratio = (mode_counts / mode_total_count[..., None])[..., None]
+        expected_rate = compiled["mode_rates"]
+        likelihood = 1.0 - np.abs(observed_ratio - expected_rate) / np.maximum(np.maximum(observed_ratio, expected_rate), 0.001)
+        log_likelihoods = MODE_LIKELIHOOD_EXPONENT * np.log(np.maximum(likelihood, MODE_LIKELIHOOD_FLOOR))
+
+    active = (mode_total_count[..., None] > 0) & (mode_counts > 0)
+    return np.where(active[..., None], log_likelihoods, 0.0)
+
+
+def mode_log_likelihoods(mode_counts, mode_total_count, compiled=COMPILED_GAME_DATA):
+    """
+    モード比率の適合度を対数で返す。
+    mode_counts: 末尾の軸がモード（MODE_KEYSの順）の配列。
+    戻り値: (..., 設定) の対数尤度。
+    """
+    return _mode_factor_log_likelihoods(mode_counts, mode_total_count, compiled).sum(axis=-2)
+
+
+# 示唆タイプごとの判定ルール
+# タイプ → (対象設定を指定する項目, 対象設定の判定, value_multiplierの既定値, exclude_multiplierの既定値)
+HINT_RULES = {
+    "normal": (None, None, 1.0, 1.0),
+    "even_settings": ("settings", np.isin, 1.0, 1e-3),
+    "odd_settings": ("settings", np.isin, 1.0, 1e-3),
+    "high_settings": ("settings", np.isin, 1.0, 1e-3),
+    "exclude_setting": ("settings", np.isin, 1e-10, 1.0),
+    "min_setting": ("setting", np.greater_equal, 1.0, 1e-3),
+    "exact_setting": ("setting", np.equal, 1.0, 1e-10),
+}
+
+
+def hint_multipliers(hint_key, hint_info):
+    """
+    示唆1回あたりの各設定への倍率を返す。
+    タイプ名や項目の誤りは黙って無視せずValueErrorにする。
+    """
+    hint_type = hint_info.get("type")
+    if hint_type not in HINT_RULES:
+        raise ValueError(f"示唆「{hint_key}」のタイプが不正です: {hint_type!r}（{', '.join(HINT_RULES)}のいずれか）")
+    target_field, matcher, default_value, default_exclude = HINT_RULES[hint_type]
+
+    settings = np.array(SETTINGS)
+    if target_field is None:
+        matched = np.ones(len(SETTINGS), dtype=bool)
+    else:
+        if target_field not in hint_info:
+            raise ValueError(f"示唆「{hint_key}」({hint_type})に\"{target_field}\"がありません")
+        targets = np.atleast_1d(hint_info[target_field])
+        if not np.all(np.isin(targets, settings)):
+            raise ValueError(f"示唆「{hint_key}」の\"{target_field}\"に存在しない設定があります: {hint_info[target_field]}")
+        matched = matcher(settings, hint_info[target_field])
+
+    multipliers = np.where(matched, hint_info.get("value_multiplier", default_value), hint_info.get("exclude_multiplier", default_exclude)).astype(float)
+    # 対数に変換するため、倍率は正の有限値に限る（除外には1e-10などの小さい値を使う）
+    if not np.all(np.isfinite(multipliers) & (multipliers > 0)):
+        raise ValueError(f"示唆「{hint_key}」の倍率は正の数にしてください: {hint_info}")
+    return multipliers
+
+
+def compile_hint_data(hint_data=HINT_DATA):
+    """
+    HINT_DATAを(示唆×設定)の対数倍率行列に変換する。起動時に一度だけ呼ぶ想定。
+    keys: 行の順番の示唆キー / index: 示唆キー → 行番号
+    """
+    keys = tuple(hint_data)
+    multipliers = np.array([hint_multipliers(hint_key, hint_data[hint_key]) for hint_key in keys]).reshape(len(keys), len(SETTINGS))
+    return {
+        "keys": keys,
+        "index": {hint_key: row for row, hint_key in enumerate(keys)},
+        "types": tuple(hint_data[hint_key]["type"] for hint_key in keys),
+        "multipliers": multipliers,
+        "log_multipliers": np.log(multipliers),
+    }
+
+
+COMPILED_HINT_DATA = compiled_spec(DEFAULT_MACHINE, "hint_data", _compile_spec_hint_data, COMPILE_VERSION)
+HINT_KEYS = COMPILED_HINT_DATA["keys"]
+
+
+def hint_count_vector(hints_observed_counts, compiled_hints=COMPILED_HINT_DATA):
+    """示唆の出現回数のdictを行番号順のベクトルにする（未知の示唆と0以下の回数は無視）。"""
+    counts = np.zeros(len(compiled_hints["keys"]))
+    for hint_key, observed_count in hints_observed_counts.items():
+        row = compiled_hints["index"].get(hint_key)
+        if row is not None and observed_count > 0:
+            counts[row] = observed_count
+    return counts
+
+
+def hint_log_likelihoods(hint_counts, compiled_hints=COMPILED_HINT_DATA):
+    """
+    示唆の出現回数ベクトル（末尾の軸が示唆）から各設定の対数尤度を返す。
+    戻り値: (..., 設定)
+    """
+    return np.maximum(np.asarray(hint_counts, dtype=float), 0.0) @ compiled_hints["log_multipliers"]
+
+
+# --- 指標ブロックごとの計算（setting_log_likelihoodsとinstrumented_log_likelihoodsで共用） ---
+def _poisson_block(data_inputs, compiled, rows=None):
+    """POISSON_METRICSのうちrowsの行（省略時は全行）のポアソン対数尤度。戻り値: (指標, 設定)"""
+    if rows is None:
+        observed_keys, trial_keys, block_compiled = compiled["observed_keys"], compiled["trial_keys"], compiled
+    else:
+        rows = list(rows)
+        observed_keys = [compiled["observed_keys"][row] for row in rows]
+        trial_keys = [compiled["trial_keys"][row] for row in rows]
+        block_compiled = {"per_trial": compiled["per_trial"][rows], "requires_hit": compiled["requires_hit"][rows]}
+    observed = [data_inputs.get(key, 0) for key in observed_keys]
+    trials = [data_inputs.get(key, 0) for key in trial_keys]
+    return poisson_log_likelihoods(observed, trials, block_compiled)
+
+
+def _mode_block(data_inputs, compiled):
+    """モードごとの適合度の対数。戻り値: (モード, 設定)"""
+    mode_observed_counts = data_inputs.get('mode_observed_counts', {})
+    mode_counts = [mode_observed_counts.get(mode_char, 0) for mode_char in MODE_KEYS]
+    return _mode_factor_log_likelihoods(mode_counts, data_inputs.get('mode_total_count', 0), compiled)
+
+
+def _hint_block(data_inputs, compiled_hints):
+    """示唆による各設定の対数尤度。戻り値: (設定,)"""
+    hint_counts = hint_count_vector(data_inputs.get('hints_observed_counts', {}), compiled_hints)
+    return hint_log_likelihoods(hint_counts, compiled_hints)
+
+
+def setting_log_likelihoods(data_inputs, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA):
+    """入力データ1件分の各設定の総合対数尤度を返す。"""
+    log_likelihoods = _poisson_block(data_inputs, compiled).sum(axis=0)
+    log_likelihoods += _mode_block(data_inputs, compiled).sum(axis=-2)
+    log_likelihoods += _hint_block(data_inputs, compiled_hints)
+    return log_likelihoods
+
+
+def _timed(block_function, *args):
+    """(block_functionの戻り値, 計算時間（秒）) を返す。"""
+    started = time.perf_counter()
+    value = block_function(*args)
+    return value, time.perf_counter() - started
+
+
+def _block_report(seconds, log_likelihoods, floor_hits):
+    return {"seconds": seconds, "log_likelihoods": log_likelihoods.tolist(), "floor_hits": int(floor_hits)}
+
+
+def instrumented_log_likelihoods(data_inputs, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA):
+    """
+    setting_log_likelihoodsと同じ値を、指標ブロックごとの内訳と一緒に返す（原因調査・計測用）。
+    計算はsetting_log_likelihoodsと同じブロック関数で行い、ここでは時間と下限の回数を測るだけにする。
+    戻り値: (log_likelihoods, report)
+        report["blocks"][ブロック名]: 計算時間（秒）、各設定の対数尤度への寄与、下限に張り付いた要素数
+        report["floor_hits"]: 尤度の下限（LIKELIHOOD_FLOOR / MODE_LIKELIHOOD_FLOOR）に張り付いた要素数の合計
+    reportはそのままJSONに変換できる。
+    """
+    started = time.perf_counter()
+
+    # ブロックごとに計算した行を元の並びに戻してから合計し、setting_log_likelihoodsと同じ丸め誤差にする
+    blocks = {}
+    metric_log_likelihoods = np.zeros((len(compiled["observed_keys"]), len(SETTINGS)))
+    for name, rows in METRIC_BLOCKS:
+        block, seconds = _timed(_poisson_block, data_inputs, compiled, rows)
+        metric_log_likelihoods[list(rows)] = block
+        blocks[name] = _block_report(seconds, block.sum(axis=0), np.sum(block <= LOG_LIKELIHOOD_FLOOR))
+    log_likelihoods = metric_log_likelihoods.sum(axis=0)
+
+    mode_factors, seconds = _timed(_mode_block, data_inputs, compiled)
+    mode_part = mode_factors.sum(axis=-2)
+    log_likelihoods += mode_part
+    blocks["mode"] = _block_report(seconds, mode_part, np.sum(mode_factors <= LOG_MODE_LIKELIHOOD_FLOOR))
+
+    hint_part, seconds = _timed(_hint_block, data_inputs, compiled_hints)
+    log_likelihoods += hint_part
+    blocks["hints"] = _block_report(seconds, hint_part, 0) # 示唆は下限で切らない
+
+    report = {
+        "seconds": time.perf_counter() - started,
+        "blocks": blocks,
+        "floor_hits": {
+            "likelihood_floor": sum(blocks[name]["floor_hits"] for name, _ in METRIC_BLOCKS),
+            "mode_likelihood_floor": blocks["mode"]["floor_hits"],
+        },
+        "log_likelihoods": log_likelihoods.tolist(),
+    }
+    return log_likelihoods, report
+
+
+def posterior_probabilities(log_likelihoods):
+    """対数尤度を対数空間のまま正規化し、各設定の確率（合計1）を返す。"""
+    from scipy.special import logsumexp
+
+    log_likelihoods = np.asarray(log_likelihoods, dtype=float)
+    return np.exp(log_likelihoods - logsumexp(log_likelihoods, axis=-1, keepdims=True))
+
+
+def predict_setting(data_inputs, cache=None, machine=None, instrument=None):
+    """
+    入力データから設定を推測し、結果をMarkdown文字列で返す。
+    cache: vvv.cache.LikelihoodCacheを渡すと対数尤度の計算結果を再利用する。機種はcacheの作成時に渡した表に従う。
+    machine: スペック表の機種名（省略時はヴァルヴレイヴ）。cacheと同時に指定する場合は、cacheと同じ機種にする。
+    instrument: 計測結果を受け取る関数。指定すると推測のたびに、instrumented_log_likelihoodsの
+                reportに推測確率（posterior）と推測設定（predicted_setting）を加えたdictを渡して呼ぶ。
+                cacheとは同時に指定できない。省略時は計測しない。
+    """
+    if cache is not None and machine is not None:
+        compiled, compiled_hints = machine_tables(machine)
+        if cache.compiled is not compiled or cache.compiled_hints is not compiled_hints:
+            raise ValueError(f"cacheは機種「{machine}」の表で作られていません")
+    if cache is not None and instrument is not None:
+        raise ValueError("cacheとinstrumentは同時に指定できません")
+
+    # データが一つも入力されていない場合のチェック
+    # (総ゲーム数またはCZ総回数があればデータありとみなす)
+    if data_inputs.get('total_game_count', 0) == 0 and data_inputs.get('cz_total_count', 0) == 0:
+        return "データが入力されていません。推測を行うには、少なくとも総ゲーム数かCZ総回数を入力してください。"
+
+    if cache is not None:
+        log_likelihoods = cache.setting_log_likelihoods(data_inputs)
+    elif instrument is not None:
+        log_likelihoods, report = instrumented_log_likelihoods(data_inputs, *machine_tables(machine))
+    elif machine is not None:
+        log_likelihoods = setting_log_likelihoods(data_inputs, *machine_tables(machine))
+    else:
+        log_likelihoods = setting_log_likelihoods(data_inputs)
+
+    # --- 最終結果の処理 ---
+    if not np.any(np.isfinite(log_likelihoods)):
+        if instrument is not None:
+            instrument({**report, "posterior": None, "predicted_setting": None})
+        return "データが不足しているか、矛盾しているため、推測が困難です。入力値を見直してください。"
+
+    probabilities = posterior_probabilities(log_likelihoods) * 100
+    normalized_probabilities = {setting: float(prob) for setting, prob in zip(SETTINGS, probabilities)}
+
+    predicted_setting = max(normalized_probabilities, key=normalized_probabilities.get)
+    max_prob_value = normalized_probabilities[predicted_setting]
+    if instrument is not None:
+        instrument({**report, "posterior": (probabilities / 100).tolist(), "predicted_setting": predicted_setting})
+
+    result_str = f"## ✨ 推測される設定: 設定{predicted_setting} (確率: 約{max_prob_value:.2f}%) ✨\n\n"
+    result_str += "--- 各設定の推測確率 ---\n"
+    for setting, prob in sorted(normalized_probabilities.items(), key=lambda item: item[1], reverse=True):
+        result_str += f"  - 設定{setting}: 約{prob:.2f}%\n"
+
+    return result_str
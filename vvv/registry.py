@@ -0,0 +1,180 @@
+"""
+機種ごとのスペック表（vvv/specs/<機種名>.json または .toml）のレジストリ。
+
+スペック表は使う時に初めて読み込み、形式を検証する。
+推測用に変換した配列はファイルのハッシュをキーにしてディスクへ保存し、次回以降は変換を省く。
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+SPEC_EXTENSIONS = (".json", ".toml")
+SPEC_FORMAT_VERSION = 1
+DEFAULT_MACHINE = "valvrave"
+
+_specs = {} # 機種名 → 検証済みのスペック
+_compiled = {} # (機種名, 変換の種類, 変換形式のバージョン) → 変換済みの配列
+
+
+def available_machines(spec_dir=SPEC_DIR):
+    """スペック表がある機種名の一覧。"""
+    if not os.path.isdir(spec_dir):
+        return []
+    return sorted({os.path.splitext(name)[0] for name in os.listdir(spec_dir) if name.endswith(SPEC_EXTENSIONS)})
+
+
+def spec_path(machine, spec_dir=SPEC_DIR):
+    for extension in SPEC_EXTENSIONS:
+        path = os.path.join(spec_dir, machine + extension)
+        if os.path.exists(path):
+            return path
+    raise ValueError(f"スペック表が見つかりません: {machine}（登録済み: {', '.join(available_machines(spec_dir))}）")
+
+
+def _parse_spec_file(path, content):
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError: # Python 3.10以前
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError(f"TOML形式のスペック表を読むにはPython 3.11以上かtomliが必要です: {path}") from None
+        return tomllib.loads(content.decode("utf-8"))
+    return json.loads(content.decode("utf-8"))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate_spec(raw, path="<spec>"):
+    """
+    読み込んだスペック表を検証し、GAME_DATA / HINT_DATAと同じ形式に変換する。
+    game_dataの各行はsettingsの順の数値リストで書き、{設定: 値}のdictに直す。
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f"スペック表の最上位はオブジェクトにしてください: {path}")
+    if raw.get("format_version") != SPEC_FORMAT_VERSION:
+        raise ValueError(f"対応していない形式のスペック表です（format_version={raw.get('format_version')}）: {path}")
+    for field in ("machine", "name", "spec_version"):
+        if not isinstance(raw.get(field), str) or not raw[field]:
+            raise ValueError(f"{field}がありません: {path}")
+
+    settings = raw.get("settings")
+    if not isinstance(settings, list) or not settings or not all(isinstance(setting, int) for setting in settings) or len(set(settings)) != len(settings):
+        raise ValueError(f"settingsは重複のない整数のリストにしてください: {path}")
+
+    game_data = {}
+    for key, values in (raw.get("game_data") or {}).items():
+        if not isinstance(values, list) or len(values) != len(settings) or not all(_is_number(value) and value >= 0 for value in values):
+            raise ValueError(f"game_dataの{key}は0以上の数値を設定の数（{len(settings)}個）並べてください: {path}")
+        game_data[key] = dict(zip(settings, (float(value) for value in values)))
+    if not game_data:
+        raise ValueError(f"game_dataがありません: {path}")
+
+    hint_data = raw.get("hint_data") or {}
+    for key, hint_info in hint_data.items():
+        if not isinstance(hint_info, dict) or not isinstance(hint_info.get("type"), str):
+            raise ValueError(f"hint_dataの{key}にtypeがありません: {path}")
+        for field in ("value_multiplier", "exclude_multiplier"):
+            if field in hint_info and not (_is_number(hint_info[field]) and hint_info[field] > 0):
+                raise ValueError(f"hint_dataの{key}の{field}は正の数にしてください: {path}")
+        listed_settings = hint_info.get("settings", [])
+        single_setting = hint_info.get("setting")
+        if not all(setting in settings for setting in listed_settings) or (single_setting is not None and single_setting not in settings):
+            raise ValueError(f"hint_dataの{key}にsettingsにない設定があります: {path}")
+
+    return {
+        "machine": raw["machine"],
+        "name": raw["name"],
+        "spec_version": raw["spec_version"],
+        "settings": tuple(settings),
+        "game_data": game_data,
+        "hint_data": hint_data,
+    }
+
+
+def load_spec(machine=DEFAULT_MACHINE, spec_dir=SPEC_DIR):
+    """
+    機種のスペック表を読み込んで検証する。同じ機種は2回目以降メモリ上の結果を返す。
+    戻り値には検証済みのデータに加えて path と sha256（ファイルのハッシュ）が入る。
+    """
+    cache_key = (machine, spec_dir)
+    if cache_key not in _specs:
+        path = spec_path(machine, spec_dir)
+        with open(path, "rb") as f:
+            content = f.read()
+        spec = validate_spec(_parse_spec_file(path, content), path)
+        if spec["machine"] != machine:
+            raise ValueError(f"ファイル名と機種名（machine={spec['machine']}）が一致しません: {path}")
+        spec["path"] = path
+        spec["sha256"] = hashlib.sha256(content).hexdigest()
+        _specs[cache_key] = spec
+    return _specs[cache_key]
+
+
+# --- 変換結果のディスクキャッシュ ---
+def cache_dir():
+    """変換結果の保存先。環境変数VVV_CACHE_DIRで変更できる。"""
+    if os.environ.get("VVV_CACHE_DIR"):
+        return os.environ["VVV_CACHE_DIR"]
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")), "vvv")
+
+
+def _save_compiled(path, compiled):
+    """配列はそのまま、それ以外（キーのタプル・dict）はJSONにしてnpzに保存する。"""
+    import numpy as np # vvvのimport時にnumpyを読み込まないよう、使う時だけimportする
+
+    arrays = {name: value for name, value in compiled.items() if isinstance(value, np.ndarray)}
+    others = {name: value for name, value in compiled.items() if not isinstance(value, np.ndarray)}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            np.savez(f, __json__=np.array(json.dumps(others, ensure_ascii=False)), **arrays)
+        os.replace(temporary_path, path) # 他のプロセスが書き途中のファイルを読まないよう置き換える
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def _load_compiled(path):
+    import numpy as np
+
+    with np.load(path, allow_pickle=False) as saved:
+        compiled = {name: saved[name] for name in saved.files if name != "__json__"}
+        for name, value in json.loads(str(saved["__json__"])).items():
+            compiled[name] = tuple(value) if isinstance(value, list) else value
+    return compiled
+
+
+def compiled_spec(machine, kind, compile_function, compile_version, spec_dir=SPEC_DIR):
+    """
+    compile_function(spec)で変換した結果（配列・タプル・dictの値を持つdict）を返す。
+    kind: 変換の種類（"game_data"など。保存ファイル名の区別に使う）
+    ファイルのハッシュとcompile_versionが同じ変換結果がディスクにあれば、変換せずにそれを読み込む。
+    """
+    spec = load_spec(machine, spec_dir)
+    memory_key = (machine, spec_dir, kind, compile_version)
+    if memory_key in _compiled:
+        return _compiled[memory_key]
+
+    path = os.path.join(cache_dir(), f"{machine}-{kind}-{spec['sha256'][:16]}-v{compile_version}.npz")
+    compiled = None
+    if os.path.exists(path):
+        try:
+            compiled = _load_compiled(path)
+        except Exception: # 途中で切れたファイル（zipfile.BadZipFile, EOFError）など、読めないキャッシュは作り直す
+            compiled = None
+    if compiled is None:
+        compiled = compile_function(spec)
+        try:
+            _save_compiled(path, compiled)
+        except OSError:
+            pass # 書き込めない環境では毎回変換する
+    _compiled[memory_key] = compiled
+    return compiled
@@ -0,0 +1,277 @@
+"""
+ローカル用の非同期HTTP推測サーバー（標準ライブラリのasyncioのみ使用）。
+
+    vvv-serve --port 8080
+
+POST /predict  JSONオブジェクト1件、または配列（vvv-estimateと同じ形式）を受け取り、推測結果を返す
+GET  /metrics  レイテンシ（p50/p99）とバッチサイズの統計
+GET  /health   死活確認
+
+数ミリ秒以内に届いたリクエストはまとめて1回のpredict_setting_batchで計算する。
+計算はスレッド（またはプロセス）プールで行い、イベントループを止めない。
+"""
+import argparse
+import asyncio
+import collections
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .cli import ERROR_FIELD, estimate_records
+
+DEFAULT_BATCH_WINDOW = 0.005 # 最初のリクエストから何秒待ってまとめるか
+DEFAULT_MAX_BATCH_SIZE = 4096
+METRICS_WINDOW = 10000 # 統計に使う直近のリクエスト数
+MAX_BODY_SIZE = 16 * 2**20
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+class ScoringService:
+    """リクエストをまとめて推測するバッチャーと、その統計。"""
+
+    def __init__(self, executor, batch_window=DEFAULT_BATCH_WINDOW, max_batch_size=DEFAULT_MAX_BATCH_SIZE, machine=None,
+                 likelihood_table=None):
+        self.executor = executor
+        self.machine = machine
+        self.likelihood_table = likelihood_table
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._queue = asyncio.Queue()
+        self._batcher = None
+
+        self.request_count = 0
+        self.batch_count = 0
+        self._latencies = collections.deque(maxlen=METRICS_WINDOW)
+        self._batch_sizes = collections.deque(maxlen=METRICS_WINDOW)
+
+    def start(self):
+        self._batcher = asyncio.get_running_loop().create_task(self._run_batches())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def score(self, records):
+        """レコードのリストを推測キューに入れ、結果がそろうまで待つ。"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            record_count = len(pending[0][0])
+            deadline = loop.time() + self.batch_window
+            while record_count < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                record_count += len(item[0])
+
+            records = [record for item_records, _ in pending for record in item_records]
+            self.batch_count += 1
+            self._batch_sizes.append(len(records))
+            try:
+                results = await loop.run_in_executor(self.executor, estimate_records, records, self.machine, self.likelihood_table)
+            except Exception:
+                # 不正な入力が混ざっていた場合は、他のリクエストを巻き込まないよう1件ずつ計算し直す
+                for item_records, future in pending:
+                    try:
+                        item_results = await loop.run_in_executor(self.executor, estimate_records, item_records, self.machine, self.likelihood_table)
+                    except Exception as error:
+                        if not future.done():
+                            future.set_exception(error)
+                    else:
+                        if not future.done():
+                            future.set_result(item_results)
+                continue
+
+            offset = 0
+            for item_records, future in pending:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(item_records)])
+                offset += len(item_records)
+
+    def record_latency(self, seconds):
+        self.request_count += 1
+        self._latencies.append(seconds)
+
+    def metrics(self):
+        latencies = list(self._latencies)
+        batch_sizes = list(self._batch_sizes)
+        return {
+            "requests": self.request_count,
+            "batches": self.batch_count,
+            "latency_ms": {
+                "p50": None if not latencies else _percentile(latencies, 50) * 1000,
+                "p99": None if not latencies else _percentile(latencies, 99) * 1000,
+            },
+            "batch_size": {
+                "mean": None if not batch_sizes else sum(batch_sizes) / len(batch_sizes),
+                "p50": _percentile(batch_sizes, 50),
+                "max": max(batch_sizes, default=None),
+            },
+        }
+
+
+# --- HTTP ---
+async def _read_request(reader):
+    """(メソッド, パス, ヘッダー, ボディ) を返す。接続が閉じられたらNone。"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    content_length = int(headers.get("content-length", 0))
+    if content_length > MAX_BODY_SIZE:
+        raise ValueError(413)
+    body = await reader.readexactly(content_length) if content_length else b""
+    return method, path.split("?", 1)[0], headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _handle_predict(service, body):
+    try:
+        payload = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return 400, {"error": "JSONとして読み込めません"}
+    single = isinstance(payload, dict)
+    records = [payload] if single else payload
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return 400, {"error": "JSONオブジェクトまたはオブジェクトの配列を送ってください"}
+    try:
+        results = await service.score(records)
+    except (TypeError, ValueError) as error:
+        return 400, {"error": str(error)}
+    except Exception as error: # ワーカーの異常終了など
+        return 500, {"error": f"{type(error).__name__}: {error}"}
+    if single:
+        return (400 if ERROR_FIELD in results[0] else 200), results[0]
+    return 200, results # 配列では不正な要素だけ {"error"} になる
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ValueError as error:
+                status = error.args[0] if error.args and error.args[0] in STATUS_TEXT else 400
+                writer.write(_response(status, {"error": "リクエストを読み込めません"}, False))
+                break
+            except asyncio.IncompleteReadError:
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+
+            started = time.perf_counter()
+            if path == "/predict":
+                if method != "POST":
+                    status, payload = 405, {"error": "POSTで送ってください"}
+                else:
+                    status, payload = await _handle_predict(service, body)
+                    service.record_latency(time.perf_counter() - started)
+            elif path == "/metrics" and method == "GET":
+                status, payload = 200, service.metrics()
+            elif path == "/health" and method == "GET":
+                status, payload = 200, {"status": "ok"}
+            else:
+                status, payload = 404, {"error": "見つかりません"}
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080, batch_window=DEFAULT_BATCH_WINDOW, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                workers=None, use_processes=False, ready=None, machine=None,
+                likelihood_table=None):
+    """サーバーを起動して止まるまで待つ。ready(server)は起動直後に呼ばれる（テストやポート確認用）。"""
+    if likelihood_table is not None:
+        # 壊れた・古いテーブルは最初のリクエストではなく起動時にエラーにする
+        from .cache import open_likelihood_table
+        from .estimator import machine_tables
+
+        open_likelihood_table(likelihood_table, machine_tables(machine)[0])
+    if use_processes:
+        # 実行中のイベントループをforkで複製しないよう、ワーカーはspawnで起動する
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    service = ScoringService(executor, batch_window, max_batch_size, machine, likelihood_table)
+    service.start()
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), host, port)
+    try:
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+        executor.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vvv-serve", description="設定推測のHTTPサーバーを起動します。")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW * 1000, help="リクエストをまとめる待ち時間（ミリ秒）")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="計算用ワーカー数")
+    parser.add_argument("--processes", action="store_true", help="スレッドではなくプロセスプールで計算する")
+    parser.add_argument("--machine", help="スペック表の機種名（省略時はヴァルヴレイヴ）")
+    parser.add_argument("--likelihood-table", help="事前計算テーブルのディレクトリ（python -m vvv.cache buildで作成）")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.batch_window_ms / 1000, args.max_batch_size, args.workers, args.processes,
+                          machine=args.machine, likelihood_table=args.likelihood_table))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
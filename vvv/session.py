@@ -0,0 +1,175 @@
+import numpy as np
+
+from .estimator import (
+    COMPILED_GAME_DATA,
+    COMPILED_HINT_DATA,
+    MODE_KEYS,
+    SETTINGS,
+    mode_log_likelihoods,
+    poisson_log_likelihoods,
+    posterior_probabilities,
+)
+
+# --- イベント種別 ---
+EVENT_GAME = "game" # ゲーム数の進行のみ
+EVENT_BONUS = "bonus" # ボーナス初当り（detail: "革命" / "決戦"）
+EVENT_CZ = "cz" # CZ突入
+EVENT_CZ_KYOUTOU_V_CHALLENGE = "cz_kyoutou_v_challenge" # 共闘Vチャレンジ出現
+EVENT_HARIKIRI_DRIVE_LOTTERY = "harikiri_drive_lottery" # ハラキリドライブ抽選（detail: 発生したか）
+EVENT_SSR_SET = "ssr_set" # 超革命ラッシュのセット獲得（detail: "10G" / "20G" / "50G" / "100G"）
+EVENT_YURIKUUKAN_CUT = "yurikuukan_cut" # 有利区間切断（detail: ハラキリドライブが発生したか）
+EVENT_MODE = "mode" # 通常時モード判明（detail: "モードA"など）
+EVENT_HINT = "hint" # 示唆出現（detail: HINT_DATAのキー）
+
+BONUS_COUNT_KEYS = {"革命": 'kakumei_bonus_count', "決戦": 'kessen_bonus_count'}
+SSR_COUNT_KEYS = {"10G": 'ssr_10g_count', "20G": 'ssr_20g_count', "50G": 'ssr_50g_count', "100G": 'ssr_100g_count'}
+
+_MODE_INDEX = {mode_char: i for i, mode_char in enumerate(MODE_KEYS)}
+
+
+def _metric_rows_by_key(compiled):
+    """入力キー → そのキーを観測回数か試行回数に使う指標の行番号。"""
+    rows_by_key = {}
+    for row, keys in enumerate(zip(compiled["observed_keys"], compiled["trial_keys"])):
+        for key in keys:
+            rows_by_key.setdefault(key, []).append(row)
+    return {key: np.array(rows) for key, rows in rows_by_key.items()}
+
+
+class SessionPosterior:
+    """
+    実戦中のイベントを1件ずつ受け取り、各設定の対数尤度を逐次更新する。
+    1イベントあたり影響を受ける指標の行だけを再計算するため、計算量は設定数に比例する。
+    結果はpredict_settingに同じ累計値を渡した場合と一致する。
+    compiled / compiled_hints: 機種の変換済みGAME_DATA / HINT_DATA（machine_tablesの戻り値）
+    """
+
+    def __init__(self, compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA):
+        self.compiled = compiled
+        self.compiled_hints = compiled_hints
+        self._rows_by_key = _metric_rows_by_key(compiled)
+        self.counts = {key: 0 for key in (*compiled["observed_keys"], *compiled["trial_keys"])}
+        self.counts.update({'kakumei_bonus_count': 0, 'kessen_bonus_count': 0, 'cz_total_count': 0, 'mode_total_count': 0})
+        self.mode_counts = np.zeros(len(MODE_KEYS))
+        self.hint_counts = np.zeros(len(compiled_hints["keys"]))
+        self.events = [] # (ゲーム数, イベント種別, detail) を発生順に保持
+
+        self._metric_log_likelihoods = np.zeros((len(compiled["observed_keys"]), len(SETTINGS)))
+        self._mode_log_likelihoods = np.zeros(len(SETTINGS))
+        self.log_likelihoods = np.zeros(len(SETTINGS))
+
+    # --- イベント入力 ---
+    def update(self, event_type, game_count=None, detail=None):
+        """
+        イベントを1件反映する。
+        game_count: イベント発生時の総ゲーム数（省略時は直前の値のまま）
+        """
+        changed_keys = []
+        if game_count is not None and game_count > self.counts['total_game_count']:
+            # 共闘Vチャレンジの試行G数も総ゲーム数で代用する
+            self.counts['total_game_count'] = game_count
+            self.counts['cz_kyoutou_v_challenge_total_count'] = game_count
+            changed_keys += ['total_game_count', 'cz_kyoutou_v_challenge_total_count']
+
+        if event_type == EVENT_GAME:
+            pass
+        elif event_type == EVENT_BONUS:
+            if detail is not None:
+                if detail not in BONUS_COUNT_KEYS:
+                    raise ValueError(f"不明なボーナス種別です: {detail}")
+                self.counts[BONUS_COUNT_KEYS[detail]] += 1
+            changed_keys += self._increment('at_first_hit_count')
+        elif event_type == EVENT_CZ:
+            self.counts['cz_total_count'] += 1
+        elif event_type == EVENT_CZ_KYOUTOU_V_CHALLENGE:
+            changed_keys += self._increment('cz_kyoutou_v_challenge_count')
+        elif event_type == EVENT_HARIKIRI_DRIVE_LOTTERY:
+            changed_keys += self._increment('harikiri_drive_total_count')
+            if detail:
+                changed_keys += self._increment('harikiri_drive_count')
+        elif event_type == EVENT_SSR_SET:
+            if detail not in SSR_COUNT_KEYS:
+                raise ValueError(f"不明なセットゲーム数です: {detail}")
+            changed_keys += self._increment('total_ssr_sets') + self._increment(SSR_COUNT_KEYS[detail])
+        elif event_type == EVENT_YURIKUUKAN_CUT:
+            changed_keys += self._increment('yurikuukan_cut_total_count')
+            if detail:
+                changed_keys += self._increment('yurikuukan_cut_hd_count')
+        elif event_type == EVENT_MODE:
+            if detail not in _MODE_INDEX:
+                raise ValueError(f"不明なモードです: {detail}")
+            self.counts['mode_total_count'] += 1
+            self.mode_counts[_MODE_INDEX[detail]] += 1
+            self._update_mode_log_likelihoods()
+        elif event_type == EVENT_HINT:
+            if detail not in self.compiled_hints["index"]:
+                raise ValueError(f"不明な示唆です: {detail}")
+            hint_index = self.compiled_hints["index"][detail]
+            self.hint_counts[hint_index] += 1
+            self.log_likelihoods += self.compiled_hints["log_multipliers"][hint_index]
+        else:
+            raise ValueError(f"不明なイベント種別です: {event_type}")
+
+        if changed_keys:
+            self._update_metric_rows(changed_keys)
+        self.events.append((self.counts['total_game_count'], event_type, detail))
+
+    def _increment(self, key):
+        self.counts[key] += 1
+        return [key]
+
+    def _update_metric_rows(self, changed_keys):
+        """変化した入力キーに関係する指標の行だけポアソン対数尤度を再計算する。"""
+        rows = np.unique(np.concatenate([self._rows_by_key[key] for key in changed_keys]))
+        observed = [self.counts[self.compiled["observed_keys"][row]] for row in rows]
+        trials = [self.counts[self.compiled["trial_keys"][row]] for row in rows]
+        sub_compiled = {"per_trial": self.compiled["per_trial"][rows], "requires_hit": self.compiled["requires_hit"][rows]}
+        new_rows = poisson_log_likelihoods(observed, trials, sub_compiled)
+
+        self.log_likelihoods += new_rows.sum(axis=0) - self._metric_log_likelihoods[rows].sum(axis=0)
+        self._metric_log_likelihoods[rows] = new_rows
+
+    def _update_mode_log_likelihoods(self):
+        new_mode_log_likelihoods = mode_log_likelihoods(self.mode_counts, self.counts['mode_total_count'], self.compiled)
+        self.log_likelihoods += new_mode_log_likelihoods - self._mode_log_likelihoods
+        self._mode_log_likelihoods = new_mode_log_likelihoods
+
+    # --- 結果 ---
+    def posterior(self):
+        """各設定の確率（合計1）を返す。"""
+        return posterior_probabilities(self.log_likelihoods)
+
+    def predicted_setting(self):
+        return int(np.argmax(self.log_likelihoods)) + SETTINGS[0]
+
+    def data_inputs(self):
+        """現在の累計値をpredict_settingに渡せる形式で返す。"""
+        data_inputs = dict(self.counts)
+        data_inputs['mode_observed_counts'] = {mode_char: int(self.mode_counts[i]) for i, mode_char in enumerate(MODE_KEYS)}
+        data_inputs['hints_observed_counts'] = {hint_key: int(self.hint_counts[i]) for i, hint_key in enumerate(self.compiled_hints["keys"])}
+        return data_inputs
+
+    # --- スナップショット ---
+    def snapshot(self):
+        """現在の状態を保存する。イベント履歴はコピーせず件数だけ記録する。"""
+        return {
+            "counts": dict(self.counts),
+            "mode_counts": self.mode_counts.copy(),
+            "hint_counts": self.hint_counts.copy(),
+            "event_count": len(self.events),
+            "metric_log_likelihoods": self._metric_log_likelihoods.copy(),
+            "mode_log_likelihoods": self._mode_log_likelihoods.copy(),
+            "log_likelihoods": self.log_likelihoods.copy(),
+        }
+
+    def restore(self, snapshot):
+        """snapshot()の時点の状態に戻す。それ以降のイベントは履歴から取り除かれる。"""
+        if snapshot["event_count"] > len(self.events):
+            raise ValueError("このスナップショット以降のイベントは既に取り消されています。")
+        self.counts = dict(snapshot["counts"])
+        self.mode_counts = snapshot["mode_counts"].copy()
+        self.hint_counts = snapshot["hint_counts"].copy()
+        del self.events[snapshot["event_count"]:]
+        self._metric_log_likelihoods = snapshot["metric_log_likelihoods"].copy()
+        self._mode_log_likelihoods = snapshot["mode_log_likelihoods"].copy()
+        self.log_likelihoods = snapshot["log_likelihoods"].copy()
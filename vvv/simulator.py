@@ -0,0 +1,184 @@
+"""
+GAME_DATA / HINT_DATA から設定ごとの模擬実戦データを生成し、推測精度を検証する。
+
+    python -m vvv.simulator --games 1000 3000 8000 --sessions 100000
+"""
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch import predict_setting_batch
+from .decision import DEFAULT_PER_BONUS_PARAMS
+from .estimator import (
+    COMPILED_GAME_DATA,
+    COMPILED_HINT_DATA,
+    METRIC_BONUS,
+    METRIC_CZ_KYOUTOU_V_CHALLENGE,
+    METRIC_HARIKIRI_DRIVE,
+    METRIC_YURIKUUKAN_CUT_HD,
+    MODE_KEYS,
+    SETTINGS,
+    SSR_METRIC_ROWS,
+    machine_tables,
+)
+
+# 解析値がない部分の仮定（1回の初当りあたりの平均回数など）
+# ハラキリドライブ抽選・セット数・有利区間切断の回数はやめ時判断と共通（vvv.decision）
+DEFAULT_SIMULATION_PARAMS = {
+    **DEFAULT_PER_BONUS_PARAMS,
+    "modes_per_bonus": 0.5, # モード判明回数
+    "hints_per_bonus": 1.0, # 示唆画面の表示回数
+    "hint_base_weight": 0.05, # normal以外の示唆の基本出現比率（normalは1）
+}
+
+CALIBRATION_BINS = 10
+DEFAULT_CHUNK_SIZE = 20000 # 1ワーカーに渡すセッション数
+
+
+def hint_probabilities(setting, hint_base_weight=DEFAULT_SIMULATION_PARAMS["hint_base_weight"], compiled_hints=COMPILED_HINT_DATA):
+    """
+    示唆画面1回あたりの各示唆の出現確率。
+    HINT_DATAには出現率がないため、基本出現比率×示唆倍率に比例すると仮定する。
+    """
+    base_weights = np.array([1.0 if hint_type == "normal" else hint_base_weight for hint_type in compiled_hints["types"]])
+    weights = base_weights * compiled_hints["multipliers"][:, setting - SETTINGS[0]]
+    return weights / weights.sum()
+
+
+def simulate_sessions(setting, game_count, session_count, rng, params=DEFAULT_SIMULATION_PARAMS,
+                      compiled=COMPILED_GAME_DATA, compiled_hints=COMPILED_HINT_DATA):
+    """
+    設定settingでgame_countゲーム遊技したセッションをsession_count件生成する。
+    compiled / compiled_hints: 機種の変換済みGAME_DATA / HINT_DATA（machine_tablesの戻り値）
+    戻り値はpredict_setting_batchにそのまま渡せる列名→配列のdict。
+    """
+    rates = compiled["per_trial"][:, setting - SETTINGS[0]] # 1試行あたりの確率（1/X形式は換算済み）
+    game_counts = np.full(session_count, game_count)
+    bonus_counts = rng.binomial(game_count, rates[METRIC_BONUS], session_count)
+    kyoutou_v_counts = rng.binomial(game_count, rates[METRIC_CZ_KYOUTOU_V_CHALLENGE], session_count)
+
+    harikiri_drive_total_counts = rng.poisson(bonus_counts * params["harikiri_drive_lotteries_per_bonus"])
+    harikiri_drive_counts = rng.binomial(harikiri_drive_total_counts, rates[METRIC_HARIKIRI_DRIVE])
+
+    ssr_set_totals = rng.poisson(bonus_counts * params["ssr_sets_per_bonus"])
+    ssr_rates = rates[list(SSR_METRIC_ROWS)]
+    ssr_counts = rng.multinomial(ssr_set_totals, ssr_rates / ssr_rates.sum())
+
+    yurikuukan_cut_totals = rng.poisson(bonus_counts * params["yurikuukan_cuts_per_bonus"])
+    yurikuukan_cut_hd_counts = rng.binomial(yurikuukan_cut_totals, rates[METRIC_YURIKUUKAN_CUT_HD])
+
+    mode_totals = rng.poisson(bonus_counts * params["modes_per_bonus"])
+    mode_rates = compiled["mode_rates"][:, setting - SETTINGS[0]]
+    mode_counts = rng.multinomial(mode_totals, mode_rates / mode_rates.sum())
+
+    hint_totals = rng.poisson(bonus_counts * params["hints_per_bonus"])
+    hint_counts = rng.multinomial(hint_totals, hint_probabilities(setting, params["hint_base_weight"], compiled_hints))
+
+    table = {
+        'total_game_count': game_counts,
+        'at_first_hit_count': bonus_counts,
+        'cz_total_count': kyoutou_v_counts,
+        'cz_kyoutou_v_challenge_count': kyoutou_v_counts,
+        'cz_kyoutou_v_challenge_total_count': game_counts,
+        'harikiri_drive_count': harikiri_drive_counts,
+        'harikiri_drive_total_count': harikiri_drive_total_counts,
+        'total_ssr_sets': ssr_set_totals,
+        'yurikuukan_cut_hd_count': yurikuukan_cut_hd_counts,
+        'yurikuukan_cut_total_count': yurikuukan_cut_totals,
+        'mode_total_count': mode_totals,
+        'mode_observed_counts': {mode_char: mode_counts[:, i] for i, mode_char in enumerate(MODE_KEYS)},
+        'hints_observed_counts': {hint_key: hint_counts[:, i] for i, hint_key in enumerate(compiled_hints["keys"])},
+    }
+    for i, row in enumerate(SSR_METRIC_ROWS):
+        table[compiled["observed_keys"][row]] = ssr_counts[:, i]
+    return table
+
+
+def _evaluate_chunk(task):
+    """ワーカー側: 1チャンク分を生成・推測し、集計値だけを返す。"""
+    setting, game_count, session_count, seed_sequence, params, machine = task
+    rng = np.random.default_rng(seed_sequence)
+    compiled, compiled_hints = machine_tables(machine)
+    table = simulate_sessions(setting, game_count, session_count, rng, params, compiled, compiled_hints)
+    posteriors, predicted_settings = predict_setting_batch(table, compiled=compiled, compiled_hints=compiled_hints)
+
+    confusion_row = np.bincount(predicted_settings, minlength=SETTINGS[-1] + 1)[SETTINGS[0]:]
+
+    scored = predicted_settings > 0
+    confidences = posteriors[scored].max(axis=-1)
+    correct = predicted_settings[scored] == setting
+    bins = np.minimum((confidences * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    calibration_counts = np.bincount(bins, minlength=CALIBRATION_BINS)
+    calibration_confidence = np.bincount(bins, weights=confidences, minlength=CALIBRATION_BINS)
+    calibration_correct = np.bincount(bins, weights=correct, minlength=CALIBRATION_BINS)
+    return setting, confusion_row, calibration_counts, calibration_confidence, calibration_correct
+
+
+def evaluate_estimator(game_count, sessions_per_setting, seed=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                       max_workers=None, params=DEFAULT_SIMULATION_PARAMS, machine=None):
+    """
+    各設定sessions_per_setting件ずつ模擬セッションを生成し、推測結果を集計する。
+    machine: スペック表の機種名（省略時はヴァルヴレイヴ）。生成と推測の両方にこの機種のスペックを使う。
+    チャンクごとに独立した乱数系列（SeedSequence.spawn）を割り当て、プロセスプールで並列実行する。
+    戻り値:
+        confusion_matrix: (実際の設定×推測された設定) の件数。推測できなかった件は含まない。
+        accuracy: 推測が実際の設定と一致した割合
+        calibration: 推測確率の区間ごとの平均推測確率・正解率・件数
+    """
+    tasks = []
+    for setting in SETTINGS:
+        for start in range(0, sessions_per_setting, chunk_size):
+            tasks.append([setting, game_count, min(chunk_size, sessions_per_setting - start), None, params, machine])
+    for task, seed_sequence in zip(tasks, np.random.SeedSequence(seed).spawn(len(tasks))):
+        task[3] = seed_sequence
+
+    confusion_matrix = np.zeros((len(SETTINGS), len(SETTINGS)), dtype=np.int64)
+    calibration_counts = np.zeros(CALIBRATION_BINS)
+    calibration_confidence = np.zeros(CALIBRATION_BINS)
+    calibration_correct = np.zeros(CALIBRATION_BINS)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for setting, confusion_row, counts, confidence, correct in executor.map(_evaluate_chunk, tasks):
+            confusion_matrix[setting - SETTINGS[0]] += confusion_row
+            calibration_counts += counts
+            calibration_confidence += confidence
+            calibration_correct += correct
+
+    with np.errstate(invalid="ignore"):
+        return {
+            "game_count": game_count,
+            "sessions_per_setting": sessions_per_setting,
+            "confusion_matrix": confusion_matrix,
+            "accuracy": np.trace(confusion_matrix) / max(confusion_matrix.sum(), 1),
+            "calibration": {
+                "bin_edges": np.linspace(0.0, 1.0, CALIBRATION_BINS + 1),
+                "mean_confidence": calibration_confidence / calibration_counts,
+                "accuracy": calibration_correct / calibration_counts,
+                "count": calibration_counts.astype(np.int64),
+            },
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="模擬実戦データで設定推測の精度を検証します。")
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 3000, 8000], help="1セッションの総ゲーム数")
+    parser.add_argument("--sessions", type=int, default=100000, help="設定ごとのセッション数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定はCPU数）")
+    parser.add_argument("--machine", help="スペック表の機種名（省略時はヴァルヴレイヴ）")
+    args = parser.parse_args(argv)
+
+    for game_count in args.games:
+        report = evaluate_estimator(game_count, args.sessions, seed=args.seed, max_workers=args.workers, machine=args.machine)
+        # 件数0の区間（NaN）はnullとして出力する
+        report["calibration"] = {
+            key: [None if np.isnan(v) else v for v in value.tolist()] for key, value in report["calibration"].items()
+        }
+        report["confusion_matrix"] = report["confusion_matrix"].tolist()
+        print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+実戦イベントの追記専用バイナリログ。
+
+1イベント = 固定長レコード（ホールID, 台番号, セッションID, ゲーム数, イベント種別, detail）。
+書き込みは追記のみ、読み込みはnp.memmapでコピーせずにNumPy配列として参照する。
+台ごとのレコード位置の索引を持ち、過去ログの再推測は全件をPythonオブジェクトにせず
+列単位の集計 → predict_setting_batch で行う。
+"""
+import json
+import os
+import tempfile
+import zlib
+
+import numpy as np
+
+from .batch import predict_setting_batch
+from .estimator import MODE_KEYS, machine_tables
+from .session import (
+    BONUS_COUNT_KEYS,
+    EVENT_BONUS,
+    EVENT_CZ,
+    EVENT_CZ_KYOUTOU_V_CHALLENGE,
+    EVENT_GAME,
+    EVENT_HARIKIRI_DRIVE_LOTTERY,
+    EVENT_HINT,
+    EVENT_MODE,
+    EVENT_SSR_SET,
+    EVENT_YURIKUUKAN_CUT,
+    SSR_COUNT_KEYS,
+    SessionPosterior,
+)
+
+EVENT_RECORD_DTYPE = np.dtype([
+    ("hall_id", "<u4"),
+    ("machine_id", "<u4"),
+    ("session_id", "<u4"),
+    ("game_count", "<u4"),
+    ("event_type", "<u2"),
+    ("detail", "<u2"),
+])
+
+# イベント種別 → レコードに書く番号（既存ログとの互換のため、番号は変更・再利用しない）
+EVENT_TYPE_CODES = {
+    EVENT_GAME: 0,
+    EVENT_BONUS: 1,
+    EVENT_CZ: 2,
+    EVENT_CZ_KYOUTOU_V_CHALLENGE: 3,
+    EVENT_HARIKIRI_DRIVE_LOTTERY: 4,
+    EVENT_SSR_SET: 5,
+    EVENT_YURIKUUKAN_CUT: 6,
+    EVENT_MODE: 7,
+    EVENT_HINT: 8,
+}
+EVENT_TYPES = {code: event_type for event_type, code in EVENT_TYPE_CODES.items()}
+
+# detailの番号付け（0は「なし」または「発生せず」）
+BONUS_DETAILS = (None, *BONUS_COUNT_KEYS)
+SSR_DETAILS = tuple(SSR_COUNT_KEYS)
+
+LOG_MAGIC = b"VVVLOG01"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("record_size", "<u4"), ("code_table_crc", "<u4")])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+INDEX_SUFFIX = ".idx.npz"
+
+
+def _code_table_crc(hint_keys):
+    """detailの番号付けに使う一覧のCRC。HINT_DATAなどの並びが変わったログを読まないために使う。"""
+    code_table = [sorted(EVENT_TYPE_CODES.items()), list(BONUS_DETAILS), list(SSR_DETAILS), list(MODE_KEYS), list(hint_keys)]
+    return zlib.crc32(json.dumps(code_table, ensure_ascii=False).encode("utf-8"))
+
+
+def detail_code_limits(hint_keys):
+    """イベント種別の番号 → detailの番号の上限（この値未満が有効）の配列。detailを使わない種別は0のみ有効。"""
+    limits = np.ones(max(EVENT_TYPE_CODES.values()) + 1, dtype=np.int64)
+    limits[EVENT_TYPE_CODES[EVENT_BONUS]] = len(BONUS_DETAILS)
+    limits[EVENT_TYPE_CODES[EVENT_HARIKIRI_DRIVE_LOTTERY]] = 2
+    limits[EVENT_TYPE_CODES[EVENT_YURIKUUKAN_CUT]] = 2
+    limits[EVENT_TYPE_CODES[EVENT_SSR_SET]] = len(SSR_DETAILS)
+    limits[EVENT_TYPE_CODES[EVENT_MODE]] = len(MODE_KEYS)
+    limits[EVENT_TYPE_CODES[EVENT_HINT]] = len(hint_keys)
+    return limits
+
+
+def valid_records_mask(records, limits):
+    """イベント種別とdetailの番号が定義の範囲内のレコードはTrue。"""
+    event_types = records["event_type"].astype(np.int64)
+    known = event_types < len(limits)
+    return known & (records["detail"] < limits[np.where(known, event_types, 0)])
+
+
+def encode_detail(event_type, detail, hint_keys):
+    """
+    SessionPosterior.updateのdetailをレコード用の番号に変換する。
+    hint_keys: 示唆の番号付けに使う機種のHINT_DATAのキー（compiled_hints["keys"]）
+    """
+    if event_type == EVENT_BONUS:
+        return BONUS_DETAILS.index(detail)
+    if event_type in (EVENT_HARIKIRI_DRIVE_LOTTERY, EVENT_YURIKUUKAN_CUT):
+        return int(bool(detail))
+    if event_type == EVENT_SSR_SET:
+        return SSR_DETAILS.index(detail)
+    if event_type == EVENT_MODE:
+        return MODE_KEYS.index(detail)
+    if event_type == EVENT_HINT:
+        return hint_keys.index(detail)
+    return 0
+
+
+def decode_detail(event_type, code, hint_keys):
+    if event_type == EVENT_BONUS:
+        return BONUS_DETAILS[code]
+    if event_type in (EVENT_HARIKIRI_DRIVE_LOTTERY, EVENT_YURIKUUKAN_CUT):
+        return bool(code)
+    if event_type == EVENT_SSR_SET:
+        return SSR_DETAILS[code]
+    if event_type == EVENT_MODE:
+        return MODE_KEYS[code]
+    if event_type == EVENT_HINT:
+        return hint_keys[code]
+    return None
+
+
+# --- 書き込み ---
+class EventLogWriter:
+    """
+    ログファイルにレコードを追記する。ファイルがなければヘッダー付きで作成する。
+    machine: スペック表の機種名（省略時はヴァルヴレイヴ）。示唆の番号付けはこの機種のHINT_DATAに従う。
+    """
+
+    def __init__(self, path, fsync=False, machine=None):
+        self.path = path
+        self.fsync = fsync
+        self.hint_keys = machine_tables(machine)[1]["keys"]
+        self._detail_code_limits = detail_code_limits(self.hint_keys)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            _read_header(path, self.hint_keys)
+        self._file = open(path, "ab")
+        if is_new:
+            header = np.array([(LOG_MAGIC, EVENT_RECORD_DTYPE.itemsize, _code_table_crc(self.hint_keys))], dtype=HEADER_DTYPE)
+            self._file.write(header.tobytes())
+            self._flush()
+
+    def append(self, hall_id, machine_id, session_id, event_type, game_count=0, detail=None):
+        if event_type not in EVENT_TYPE_CODES:
+            raise ValueError(f"不明なイベント種別です: {event_type}")
+        try:
+            detail_code = encode_detail(event_type, detail, self.hint_keys)
+        except ValueError:
+            raise ValueError(f"不明なdetailです: {event_type} {detail}") from None
+        record = np.array([(hall_id, machine_id, session_id, game_count, EVENT_TYPE_CODES[event_type], detail_code)], dtype=EVENT_RECORD_DTYPE)
+        self.append_records(record)
+
+    def append_records(self, records):
+        """
+        EVENT_RECORD_DTYPEの配列をまとめて追記する。
+        イベント種別やdetailの番号が範囲外のレコードがあれば、1件も書かずにValueErrorにする。
+        """
+        records = np.ascontiguousarray(records, dtype=EVENT_RECORD_DTYPE).reshape(-1)
+        invalid = np.flatnonzero(~valid_records_mask(records, self._detail_code_limits))
+        if len(invalid):
+            record = records[invalid[0]]
+            raise ValueError(f"不正なレコードがあります（{invalid[0] + 1}件目: 種別{record['event_type']} detail{record['detail']}、ほか{len(invalid) - 1}件）")
+        self._file.write(records.tobytes())
+        self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# --- 読み込み ---
+def _read_header(path, hint_keys):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != LOG_MAGIC:
+        raise ValueError(f"イベントログではありません: {path}")
+    if header["record_size"][0] != EVENT_RECORD_DTYPE.itemsize:
+        raise ValueError(f"レコード長が一致しません: {path}")
+    if header["code_table_crc"][0] != _code_table_crc(hint_keys):
+        raise ValueError(f"示唆・モードなどの定義がログ作成時と異なるため読み込めません: {path}")
+
+
+def _save_index(path, **arrays):
+    """他のプロセスが書き途中の索引を読まないよう、一時ファイルに書いてから置き換える。"""
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+class EventLog:
+    """
+    ログファイルをメモリマップで開く。records はファイルを直接参照する構造化配列。
+    書き込み途中で切れた末尾の不完全なレコードは無視する。
+    machine: スペック表の機種名（省略時はヴァルヴレイヴ）。ログを書いた時と同じ機種を指定する。
+    """
+
+    def __init__(self, path, machine=None):
+        self.compiled, self.compiled_hints = machine_tables(machine)
+        _read_header(path, self.compiled_hints["keys"])
+        self._detail_code_limits = detail_code_limits(self.compiled_hints["keys"])
+        self.path = path
+        record_count = (os.path.getsize(path) - HEADER_SIZE) // EVENT_RECORD_DTYPE.itemsize
+        if record_count > 0:
+            self.records = np.memmap(path, dtype=EVENT_RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(record_count,))
+        else:
+            self.records = np.empty(0, dtype=EVENT_RECORD_DTYPE)
+        self._index = None
+
+    def __len__(self):
+        return len(self.records)
+
+    # --- 台ごとの索引 ---
+    def _machine_groups(self):
+        """(ホールID, 台番号)の組の一覧と、各レコードがその何番目に当たるか。"""
+        packed = (self.records["hall_id"].astype(np.uint64) << np.uint64(32)) | self.records["machine_id"]
+        packed_keys, machine_of_record = np.unique(packed, return_inverse=True)
+        machine_keys = np.stack([packed_keys >> np.uint64(32), packed_keys & np.uint64(0xFFFFFFFF)], axis=-1).astype(np.uint32)
+        return machine_keys, machine_of_record.reshape(-1)
+
+    def machine_index(self):
+        """
+        (machine_keys, starts, order) を返す。
+        machine_keysは(ホールID, 台番号)の組、order[starts[i]:starts[i + 1]]がi番目の台のレコード位置（発生順）。
+        ログと同じ場所に保存し、レコード数が変わっていなければ再利用する。
+        """
+        if self._index is not None:
+            return self._index
+        index_path = self.path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            try:
+                with np.load(index_path) as saved:
+                    if int(saved["record_count"]) == len(self.records):
+                        self._index = (saved["machine_keys"], saved["starts"], saved["order"])
+                        return self._index
+            except Exception: # 途中で切れたファイル（zipfile.BadZipFile, EOFError）など、読めない索引は作り直す
+                pass
+
+        machine_keys, machine_of_record = self._machine_groups()
+        order = np.argsort(machine_of_record, kind="stable")
+        starts = np.searchsorted(machine_of_record[order], np.arange(len(machine_keys) + 1))
+        self._index = (machine_keys, starts, order)
+        try:
+            _save_index(index_path, record_count=len(self.records), machine_keys=machine_keys, starts=starts, order=order)
+        except OSError:
+            pass # 読み込み専用の場所では索引を保存しない
+        return self._index
+
+    def machine_records(self, hall_id, machine_id):
+        """1台分のレコードを発生順に返す。"""
+        machine_keys, starts, order = self.machine_index()
+        matches = np.flatnonzero((machine_keys[:, 0] == hall_id) & (machine_keys[:, 1] == machine_id))
+        if len(matches) == 0:
+            return np.empty(0, dtype=EVENT_RECORD_DTYPE)
+        machine = matches[0]
+        return self.records[order[starts[machine]:starts[machine + 1]]]
+
+    def replay(self, hall_id, machine_id, session_id):
+        """
+        1セッション分のイベントを発生順にSessionPosteriorへ流し込む。
+        種別やdetailの番号が範囲外のレコードは、session_tableと同じくゲーム数の進行としてだけ扱う。
+        """
+        records = self.machine_records(hall_id, machine_id)
+        records = records[records["session_id"] == session_id]
+        session = SessionPosterior(self.compiled, self.compiled_hints)
+        for record, valid in zip(records, valid_records_mask(records, self._detail_code_limits)):
+            if not valid:
+                session.update(EVENT_GAME, int(record["game_count"]))
+                continue
+            event_type = EVENT_TYPES[int(record["event_type"])]
+            session.update(event_type, int(record["game_count"]), decode_detail(event_type, int(record["detail"]), self.compiled_hints["keys"]))
+        return session
+
+    # --- 一括集計 ---
+    def session_table(self, chunk_size=1 << 20):
+        """
+        セッション（ホールID, 台番号, セッションID）ごとに累計値を集計する。
+        戻り値: (session_keys, table)
+            session_keys: (セッション数×3) の配列
+            table: predict_setting_batchに渡せる列名→配列のdict
+        """
+        machine_keys, machine_of_record = self._machine_groups()
+        packed = (machine_of_record.astype(np.uint64) << np.uint64(32)) | self.records["session_id"]
+        order = np.argsort(packed)
+        sorted_packed = packed[order]
+        is_first = np.empty(len(order), dtype=bool)
+        is_first[:1] = True
+        np.not_equal(sorted_packed[1:], sorted_packed[:-1], out=is_first[1:])
+        starts = np.flatnonzero(is_first)
+        packed_keys = sorted_packed[starts]
+        session_of_record = np.empty(len(order), dtype=np.intp)
+        session_of_record[order] = np.cumsum(is_first) - 1
+        session_keys = np.column_stack([machine_keys[packed_keys >> np.uint64(32)], (packed_keys & np.uint64(0xFFFFFFFF)).astype(np.uint32)])
+        session_count = len(session_keys)
+
+        counts = {}
+        # ufunc.atは遅いため、最大値はセッション順に並べたうえでreduceatで求める
+        if session_count:
+            total_game_count = np.maximum.reduceat(self.records["game_count"][order], starts).astype(float)
+        else:
+            total_game_count = np.zeros(0)
+        hint_keys = self.compiled_hints["keys"]
+        mode_counts = np.zeros(session_count * len(MODE_KEYS))
+        hint_counts = np.zeros(session_count * len(hint_keys))
+
+        def add(key, sessions, mask):
+            counts[key] = counts.get(key, 0) + np.bincount(sessions, weights=mask, minlength=session_count)
+
+        for start in range(0, len(self.records), chunk_size):
+            chunk = self.records[start:start + chunk_size]
+            sessions = session_of_record[start:start + chunk_size]
+            # 種別やdetailの番号が範囲外のレコードは、別のセッション・モードに数えないようゲーム数の進行として扱う
+            event_types = np.where(valid_records_mask(chunk, self._detail_code_limits), chunk["event_type"], EVENT_TYPE_CODES[EVENT_GAME])
+            details = chunk["detail"]
+
+            is_bonus = event_types == EVENT_TYPE_CODES[EVENT_BONUS]
+            add('at_first_hit_count', sessions, is_bonus)
+            for code, bonus_type in enumerate(BONUS_DETAILS):
+                if bonus_type is not None:
+                    add(BONUS_COUNT_KEYS[bonus_type], sessions, is_bonus & (details == code))
+            add('cz_total_count', sessions, event_types == EVENT_TYPE_CODES[EVENT_CZ])
+            add('cz_kyoutou_v_challenge_count', sessions, event_types == EVENT_TYPE_CODES[EVENT_CZ_KYOUTOU_V_CHALLENGE])
+
+            is_lottery = event_types == EVENT_TYPE_CODES[EVENT_HARIKIRI_DRIVE_LOTTERY]
+            add('harikiri_drive_total_count', sessions, is_lottery)
+            add('harikiri_drive_count', sessions, is_lottery & (details == 1))
+
+            is_ssr_set = event_types == EVENT_TYPE_CODES[EVENT_SSR_SET]
+            add('total_ssr_sets', sessions, is_ssr_set)
+            for code, game_type in enumerate(SSR_DETAILS):
+                add(SSR_COUNT_KEYS[game_type], sessions, is_ssr_set & (details == code))
+
+            is_cut = event_types == EVENT_TYPE_CODES[EVENT_YURIKUUKAN_CUT]
+            add('yurikuukan_cut_total_count', sessions, is_cut)
+            add('yurikuukan_cut_hd_count', sessions, is_cut & (details == 1))
+
+            is_mode = event_types == EVENT_TYPE_CODES[EVENT_MODE]
+            mode_counts += np.bincount(sessions[is_mode] * len(MODE_KEYS) + details[is_mode], minlength=len(mode_counts))
+            is_hint = event_types == EVENT_TYPE_CODES[EVENT_HINT]
+            hint_counts += np.bincount(sessions[is_hint] * len(hint_keys) + details[is_hint], minlength=len(hint_counts))
+
+        mode_counts = mode_counts.reshape(session_count, len(MODE_KEYS))
+        hint_counts = hint_counts.reshape(session_count, len(hint_keys))
+
+        table = {key: value for key, value in counts.items()}
+        # SessionPosteriorと同じく、共闘Vチャレンジの試行G数は総ゲーム数で代用する
+        table['total_game_count'] = total_game_count
+        table['cz_kyoutou_v_challenge_total_count'] = total_game_count
+        table['mode_total_count'] = mode_counts.sum(axis=-1)
+        table['mode_observed_counts'] = {mode_char: mode_counts[:, i] for i, mode_char in enumerate(MODE_KEYS)}
+        table['hints_observed_counts'] = {hint_key: hint_counts[:, i] for i, hint_key in enumerate(hint_keys)}
+        return session_keys, table
+
+    def rescore(self):
+        """全セッションを再推測する。戻り値: (session_keys, posteriors, predicted_settings)"""
+        session_keys, table = self.session_table()
+        posteriors, predicted_settings = predict_setting_batch(table, compiled=self.compiled, compiled_hints=self.compiled_hints)
+        return session_keys, posteriors, predicted_settings